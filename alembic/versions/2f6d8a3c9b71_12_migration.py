@@ -0,0 +1,35 @@
+"""12 migration
+
+Revision ID: 2f6d8a3c9b71
+Revises: e91d4b7a2c36
+Create Date: 2026-10-18 18:42:37.915204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2f6d8a3c9b71'
+down_revision = 'e91d4b7a2c36'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # если в чате уже несколько незавершенных игр, оставляем только последнюю
+    op.execute(
+        "UPDATE game SET status = 3, finished_at = now(), question_deadline = NULL "
+        "WHERE status <> 3 AND id NOT IN (SELECT max(id) FROM game WHERE status <> 3 GROUP BY chat_id)"
+    )
+    op.create_index(
+        'ux_game_active_chat_id', 'game', ['chat_id'], unique=True, postgresql_where=sa.text('status <> 3')
+    )
+    op.create_index('ix_game_winner_user_id', 'game', ['winner_user_id'], unique=False)
+    op.create_index('ix_score_game_id', 'score', ['game_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_score_game_id', table_name='score')
+    op.drop_index('ix_game_winner_user_id', table_name='game')
+    op.drop_index('ux_game_active_chat_id', table_name='game')
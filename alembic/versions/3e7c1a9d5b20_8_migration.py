@@ -0,0 +1,24 @@
+"""8 migration
+
+Revision ID: 3e7c1a9d5b20
+Revises: b3f08ab565ca
+Create Date: 2026-10-18 10:12:41.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3e7c1a9d5b20'
+down_revision = 'b3f08ab565ca'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('game', sa.Column('question_deadline', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('game', 'question_deadline')
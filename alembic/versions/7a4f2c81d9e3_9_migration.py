@@ -0,0 +1,31 @@
+"""9 migration
+
+Revision ID: 7a4f2c81d9e3
+Revises: 3e7c1a9d5b20
+Create Date: 2026-10-18 11:02:15.904113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a4f2c81d9e3'
+down_revision = '3e7c1a9d5b20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(op.f('ix_questions_theme_id'), 'questions', ['theme_id'], unique=False)
+    op.create_index(op.f('ix_answers_question_id'), 'answers', ['question_id'], unique=False)
+    op.create_index(
+        'ix_questions_title_pattern', 'questions', ['title'], unique=False,
+        postgresql_ops={'title': 'text_pattern_ops'},
+    )
+
+
+def downgrade():
+    op.drop_index('ix_questions_title_pattern', table_name='questions')
+    op.drop_index(op.f('ix_answers_question_id'), table_name='answers')
+    op.drop_index(op.f('ix_questions_theme_id'), table_name='questions')
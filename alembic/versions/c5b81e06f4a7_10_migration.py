@@ -0,0 +1,49 @@
+"""10 migration
+
+Revision ID: c5b81e06f4a7
+Revises: 7a4f2c81d9e3
+Create Date: 2026-10-18 12:20:37.511842
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5b81e06f4a7'
+down_revision = '7a4f2c81d9e3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'game_stats_daily',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('games_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('duration_total', sa.Interval(), server_default='0', nullable=False),
+        sa.PrimaryKeyConstraint('day'),
+    )
+    op.create_table(
+        'winner_stats',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('win_count', sa.Integer(), server_default='0', nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id'),
+    )
+    # переносим уже завершенные игры (status = 3, StatusGame.FINISHED)
+    op.execute(
+        "INSERT INTO game_stats_daily (day, games_count, duration_total) "
+        "SELECT started_at::date, count(*), sum(finished_at - started_at) "
+        "FROM game WHERE status = 3 GROUP BY started_at::date"
+    )
+    op.execute(
+        "INSERT INTO winner_stats (user_id, win_count) "
+        "SELECT winner_user_id, count(*) FROM game "
+        "WHERE winner_user_id IS NOT NULL GROUP BY winner_user_id"
+    )
+
+
+def downgrade():
+    op.drop_table('winner_stats')
+    op.drop_table('game_stats_daily')
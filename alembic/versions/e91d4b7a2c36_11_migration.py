@@ -0,0 +1,32 @@
+"""11 migration
+
+Revision ID: e91d4b7a2c36
+Revises: c5b81e06f4a7
+Create Date: 2026-10-18 16:05:12.447019
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e91d4b7a2c36'
+down_revision = 'c5b81e06f4a7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('game', sa.Column('question_deck', sa.ARRAY(sa.Integer()), nullable=True))
+    op.add_column('game', sa.Column('deck_cursor', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('game', sa.Column('theme_id', sa.Integer(), nullable=True))
+    op.create_foreign_key(None, 'game', 'themes', ['theme_id'], ['id'], ondelete='SET NULL')
+    op.create_index('ix_game_chat_id', 'game', ['chat_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_game_chat_id', table_name='game')
+    op.drop_constraint('game_theme_id_fkey', 'game', type_='foreignkey')
+    op.drop_column('game', 'theme_id')
+    op.drop_column('game', 'deck_cursor')
+    op.drop_column('game', 'question_deck')
@@ -43,6 +43,7 @@ class ListGameStatsSchema(Schema):
 
 class ListGamePageSchema(Schema):
     page = fields.Int()
+    after_id = fields.Int()
 
 
 class ListGameStatsPageSchema(Schema):
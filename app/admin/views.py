@@ -1,15 +1,24 @@
+import asyncio
+
 from aiohttp_apispec import request_schema, response_schema, querystring_schema
 from aiohttp_session import new_session
 
 from app.admin.schemes import AdminSchema, ListGameSchema, ListGameStatsSchema, ListGamePageSchema, \
     ListGameStatsPageSchema
-from app.quiz.models import StatusGame
 from app.web.app import View
-from aiohttp.web import HTTPForbidden, HTTPUnauthorized
+from app.web.auth import get_admin
+from app.web.cache import cached_response
+from aiohttp.web import HTTPForbidden, HTTPServiceUnavailable, HTTPUnauthorized
 
+from app.web.serializers import compile_serializer
 from app.web.utils import json_response
 
 LIMIT = 5
+STATS_TIMEOUT = 5  # секунд на все запросы статистики
+
+admin_schema = AdminSchema()
+dump_game_list = compile_serializer(ListGameSchema())
+dump_game_stats = compile_serializer(ListGameStatsSchema())
 
 class AdminLoginView(View):
     @request_schema(AdminSchema)
@@ -19,7 +28,7 @@ class AdminLoginView(View):
         admin = await self.store.admins.get_by_email(email)
         if not admin or not admin.is_password_valid(password):
             raise HTTPForbidden
-        admin_data = AdminSchema().dump(admin)
+        admin_data = admin_schema.dump(admin)
         response = json_response(data=admin_data)
         session = await new_session(request=self.request)
         session["admin"] = admin_data
@@ -29,39 +38,38 @@ class AdminLoginView(View):
 class AdminCurrentView(View):
     @response_schema(AdminSchema, 200)
     async def get(self):
-        if self.request.admin:
-            return json_response(data=AdminSchema().dump(self.request.admin))
+        admin = await get_admin(self.request)
+        if admin:
+            return json_response(data=admin_schema.dump(admin))
         raise HTTPUnauthorized
 
 
 class FetchGamesView(View):
     @querystring_schema(ListGamePageSchema)
     @response_schema(ListGameSchema)
+    @cached_response("games")
     async def get(self):
-        page = self.data.get("page", 0)
-        offset = LIMIT * page
-        games_db = await self.store.game.list_finish_games(status=StatusGame.FINISHED, limit=LIMIT, offset=offset)
-        games = []
-        for game in games_db:
-            winners = sorted(game.users, key=lambda x: x.points, reverse=True) if game.users else None
-            winner = {
-                    "vk_id": winners[0].vk_id if winners else None,
-                    "points": winners[0].points if winners else None,
-                }
-            games.append({
-                "id": game.id,
-                "chat_id": game.chat_id,
-                "started_at": game.started_at,
-                "duration": (game.finished_at - game.started_at).total_seconds(),
-                "winner": winner,
-                "finished_at": game.finished_at,
-            })
-        total = await self.store.game.count_games(status=StatusGame.FINISHED)
+        after_id = self.data.get("after_id")
+        # page оставлен для старых клиентов, курсор after_id быстрее на дальних страницах
+        offset = LIMIT * self.data.get("page", 0) if after_id is None else None
+        total, games = await self.store.game.page_finished_games(limit=LIMIT, after_id=after_id, offset=offset)
         return json_response(
-            data=ListGameSchema().dump(
+            data=dump_game_list(
                 {
                     "total": total,
-                    "games": games,
+                    "games": [
+                        {
+                            "id": game.id,
+                            "chat_id": game.chat_id,
+                            "started_at": game.started_at,
+                            "duration": game.duration.total_seconds(),
+                            "winner": {
+                                "vk_id": game.winner_vk_id,
+                                "points": game.winner_points,
+                            },
+                            "finished_at": game.finished_at,
+                        } for game in games
+                    ],
                 }
             )
         )
@@ -70,25 +78,24 @@ class FetchGamesView(View):
 class FetchGameStatsView(View):
     @querystring_schema(ListGameStatsPageSchema)
     @response_schema(ListGameStatsSchema)
+    @cached_response("games")
     async def get(self):
         page = self.data.get("page", 0)
         offset = LIMIT * page
-        winners = await self.store.game.list_winners(limit=LIMIT, offset=offset)
-        winners_top = [el.to_dict() for el in winners]
-        total = await self.store.game.count_games(status=StatusGame.FINISHED)
-        duration_total = await self.store.game.duration_total()
-        print('duration_total', duration_total)
-        duration_average = await self.store.game.duration_average()
-        print('duration_average', duration_average)
-        games_average_per_day = await self.store.game.games_average_per_day()
+        try:
+            stats = await asyncio.wait_for(
+                self.store.game.get_stats(limit=LIMIT, offset=offset), timeout=STATS_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            raise HTTPServiceUnavailable(text="statistics are temporarily unavailable")
         return json_response(
-            data=ListGameStatsSchema().dump(
+            data=dump_game_stats(
                 {
-                    "winners_top": winners_top,
-                    "games_total": total,
-                    "duration_total": duration_total.total_seconds() if duration_total else None,
-                    "duration_average": duration_average.total_seconds() if duration_average else None,
-                    "games_average_per_day": games_average_per_day,
+                    "winners_top": stats.winners_top,
+                    "games_total": stats.games_total,
+                    "duration_total": stats.duration_total.total_seconds() if stats.duration_total else None,
+                    "duration_average": stats.duration_average.total_seconds() if stats.duration_average else None,
+                    "games_average_per_day": stats.games_average_per_day,
                 }
             )
-        )
\ No newline at end of file
+        )
@@ -17,3 +17,8 @@ class BaseAccessor:
 
     async def disconnect(self, app: "Application"):
         return
+
+    def invalidate_cache(self, *tags: str) -> None:
+        """ Сбрасываем закэшированные ответы, построенные на измененных данных """
+        if self.app.response_cache is not None:
+            self.app.response_cache.invalidate(*tags)
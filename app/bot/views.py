@@ -0,0 +1,40 @@
+import json
+
+from aiohttp.web_exceptions import HTTPBadRequest, HTTPForbidden
+from aiohttp.web_response import Response
+
+from app.web.app import View
+
+CONFIRMATION = "confirmation"
+
+
+class VkCallbackView(View):
+    async def post(self):
+        """
+            Событие Callback API.
+            Отвечаем ok, как только обновление попало в очередь чата,
+            обработка идет в пуле воркеров, как и при long poll
+        """
+        try:
+            event = await self.request.json()
+        except json.JSONDecodeError:
+            raise HTTPBadRequest
+        config = self.request.app.config.bot
+        if event.get("group_id") != config.group_id:
+            raise HTTPForbidden
+        if event.get("type") == CONFIRMATION:
+            return Response(text=config.confirmation_code or "")
+        if config.secret and event.get("secret") != config.secret:
+            raise HTTPForbidden
+
+        event_id = event.get("event_id")
+        if event_id is not None:
+            recent_events = self.store.vk_api.recent_events
+            if recent_events.get(event_id) is not None:
+                return Response(text="ok")
+            recent_events.set(event_id, True)
+
+        update = self.store.vk_api.parse_update(event)
+        if update is not None:
+            await self.store.vk_api.sink.submit(update)
+        return Response(text="ok")
@@ -0,0 +1,66 @@
+import multiprocessing
+import signal
+from logging import getLogger
+from typing import List, Optional
+
+from aiohttp.web import run_app
+
+from app.cluster.roles import ProcessRole, Role
+from app.web.config import load_config
+
+
+def run_process(config_path: str, role: ProcessRole, port: Optional[int] = None) -> None:
+    """ Запуск одного процесса в заданной роли """
+    from app.web.app import setup_app
+
+    app = setup_app(config_path=config_path, role=role)
+    cluster = app.config.cluster
+    run_app(
+        app,
+        host=cluster.host,
+        port=port or cluster.port,
+        # несколько процессов api слушают один порт, ядро раздает им соединения
+        reuse_port=role.name == Role.API,
+    )
+
+
+def run_cluster(config_path: str) -> None:
+    """
+        Приемник long poll, N воркеров и процессы API.
+        Воркеры стартуют первыми, чтобы приемнику было куда отдавать обновления.
+        Приемник и воркеры отдают /metrics и /health на портах port+1 и port+2+index
+    """
+    logger = getLogger("cluster")
+    cluster = load_config(config_path).cluster
+    context = multiprocessing.get_context("spawn")
+    specs = [
+        (ProcessRole(name=Role.WORKER, index=index, workers=cluster.workers), cluster.port + 2 + index)
+        for index in range(cluster.workers)
+    ]
+    specs.append((ProcessRole(name=Role.RECEIVER, workers=cluster.workers), cluster.port + 1))
+    specs.extend(
+        (ProcessRole(name=Role.API, workers=cluster.workers), cluster.port) for _ in range(cluster.api_processes)
+    )
+
+    processes: List[multiprocessing.Process] = []
+    for role, port in specs:
+        process = context.Process(
+            target=run_process, args=(config_path, role, port), name=f"{role.name}-{role.index}",
+        )
+        process.start()
+        processes.append(process)
+        logger.info("started %s on port %s, pid %s", process.name, port, process.pid)
+
+    def terminate(*_):
+        # приемник останавливаем первым, воркеры успеют обработать принятые обновления
+        for process in reversed(processes):
+            if process.is_alive():
+                process.terminate()
+                process.join()
+
+    signal.signal(signal.SIGTERM, terminate)
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        terminate()
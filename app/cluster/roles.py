@@ -0,0 +1,40 @@
+from dataclasses import dataclass
+
+
+class Role:
+    ALL = "all"  # админка, long poll и обработка игр в одном процессе
+    RECEIVER = "receiver"  # только получение событий VK, обновления уходят воркерам
+    WORKER = "worker"  # обработка игр своей доли чатов
+    API = "api"  # только HTTP API админки
+
+    CHOICES = [ALL, RECEIVER, WORKER, API]
+
+
+def shard_for(peer_id: int, shards: int) -> int:
+    """ Номер воркера, который обслуживает чат """
+    return peer_id % shards
+
+
+@dataclass
+class ProcessRole:
+    name: str = Role.ALL
+    index: int = 0
+    workers: int = 1
+
+    @property
+    def serves_api(self) -> bool:
+        return self.name in (Role.ALL, Role.API)
+
+    @property
+    def receives_updates(self) -> bool:
+        """ Процесс получает события VK: long poll или Callback API """
+        return self.name in (Role.ALL, Role.RECEIVER)
+
+    @property
+    def handles_updates(self) -> bool:
+        return self.name in (Role.ALL, Role.WORKER)
+
+    def owns_chat(self, chat_id: int) -> bool:
+        if self.name != Role.WORKER:
+            return self.handles_updates
+        return shard_for(chat_id, self.workers) == self.index
@@ -0,0 +1,147 @@
+import asyncio
+import dataclasses
+import json
+import os
+from asyncio import Queue, QueueFull, StreamReader, StreamWriter, Task
+from logging import getLogger
+from typing import Dict, List, Optional, Set
+
+from app.cluster.roles import shard_for
+from app.store.vk_api.dataclasses import Update
+from app.store.vk_api.worker_pool import ChatWorkerPool
+from app.web.utils import encode_json
+
+
+def socket_path(socket_dir: str, index: int) -> str:
+    return os.path.join(socket_dir, f"worker-{index}.sock")
+
+
+class UpdateRouter:
+    """
+        Раздает обновления воркерам через Unix сокеты по peer_id.
+        У каждого воркера своя ограниченная очередь и своя задача отправки
+        с одним соединением, поэтому события одного чата приходят воркеру
+        в том же порядке, в каком их отдал VK, а недоступный воркер
+        не задерживает обновления остальных
+    """
+    RECONNECT_DELAY = 0.5  # секунд, удваивается с каждой попыткой
+    RECONNECT_DELAY_MAX = 5.0
+    STOP_TIMEOUT = 5.0  # секунд на отправку накопленных обновлений при остановке
+
+    def __init__(self, socket_paths: List[str], max_pending: int = 10000):
+        self.socket_paths = socket_paths
+        self.logger = getLogger("router")
+        self.dropped_total = 0
+        # воркеры, до которых сейчас не удается достучаться
+        self.down: Set[int] = set()
+        self._queues: List[Queue] = [Queue(maxsize=max_pending) for _ in socket_paths]
+        # обновления в очереди и в отправке по каждому воркеру
+        self._unsent: List[int] = [0] * len(socket_paths)
+        self._writers: Dict[int, StreamWriter] = {}
+        self._tasks: List[Task] = []
+
+    @property
+    def pending(self) -> int:
+        return sum(self._unsent)
+
+    def start(self) -> None:
+        self._tasks = [asyncio.create_task(self._send(index)) for index in range(len(self.socket_paths))]
+
+    async def stop(self) -> None:
+        """ Дожидаемся отправки обновлений доступным воркерам, недоступным они теряются """
+        alive = [queue.join() for index, queue in enumerate(self._queues) if index not in self.down]
+        try:
+            await asyncio.wait_for(asyncio.gather(*alive), timeout=self.STOP_TIMEOUT)
+        except asyncio.TimeoutError:
+            self.logger.warning("router stopped before all updates were sent")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self.dropped_total += self.pending
+        for writer in self._writers.values():
+            writer.close()
+        self._writers = {}
+
+    async def submit(self, update: Update) -> None:
+        """ Только ставим обновление в очередь воркера, отправляет его задача воркера """
+        index = shard_for(update.object.peer_id, len(self.socket_paths))
+        line = encode_json(dataclasses.asdict(update)) + b"\n"
+        try:
+            self._queues[index].put_nowait(line)
+            self._unsent[index] += 1
+        except QueueFull:
+            self.dropped_total += 1
+            self.logger.warning("worker %s queue is full, update for chat %s dropped", index, update.object.peer_id)
+
+    async def _send(self, index: int) -> None:
+        queue = self._queues[index]
+        while True:
+            line = await queue.get()
+            attempt = 0
+            while True:
+                try:
+                    writer = await self._writer(index)
+                    writer.write(line)
+                    # ждем, если воркер не успевает читать
+                    await writer.drain()
+                    break
+                except (ConnectionError, FileNotFoundError) as e:
+                    self._writers.pop(index, None)
+                    if index not in self.down:
+                        self.down.add(index)
+                        self.logger.error("worker %s is unavailable: %r", index, e)
+                    await asyncio.sleep(min(self.RECONNECT_DELAY * 2 ** attempt, self.RECONNECT_DELAY_MAX))
+                    attempt += 1
+            if index in self.down:
+                self.down.discard(index)
+                self.logger.info("worker %s is available again", index)
+            self._unsent[index] -= 1
+            queue.task_done()
+
+    async def _writer(self, index: int) -> StreamWriter:
+        writer = self._writers.get(index)
+        if writer is None or writer.is_closing():
+            _, writer = await asyncio.open_unix_connection(self.socket_paths[index])
+            self._writers[index] = writer
+        return writer
+
+
+class UpdateServer:
+    """ Принимает обновления от приемника и ставит их в пул воркера """
+
+    def __init__(self, path: str, pool: ChatWorkerPool):
+        self.path = path
+        self.pool = pool
+        self.logger = getLogger("update_server")
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._server = await asyncio.start_unix_server(self._serve, path=self.path)
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    async def _serve(self, reader: StreamReader, writer: StreamWriter) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    update = Update.from_dict(json.loads(line))
+                except (ValueError, KeyError, TypeError) as e:
+                    self.logger.error("bad update %r", line, exc_info=e)
+                    continue
+                # пул ждет, когда переполнен, и чтение сокета останавливается вместе с ним
+                await self.pool.submit(update)
+        finally:
+            writer.close()
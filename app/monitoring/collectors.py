@@ -0,0 +1,104 @@
+import typing
+from typing import Callable, Optional
+
+from app.monitoring.metrics import Counter, CounterFunc, Gauge, Histogram, Registry
+
+if typing.TYPE_CHECKING:
+    from app.web.app import Application
+
+
+class AppMetrics:
+    """
+        Метрики приложения.
+        Задержки копятся в гистограммах по ходу работы,
+        размеры очередей и пулов снимаются с объектов в момент сбора
+    """
+    POLL_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 20, 25, 30, 35, 60)
+
+    def __init__(self, app: "Application"):
+        self.app = app
+        self.registry = Registry()
+        register = self.registry.register
+
+        self.poll_seconds = register(Histogram(
+            "vk_poll_seconds", "Duration of long poll requests", buckets=self.POLL_BUCKETS,
+        ))
+        self.handler_seconds = register(Histogram(
+            "bot_handler_seconds", "Update handling duration by action", labelnames=("action",),
+        ))
+        self.handler_errors_total = register(Counter(
+            "bot_handler_errors_total", "Updates failed with an exception by action", labelnames=("action",),
+        ))
+
+        pool = self._worker_pool
+        register(Gauge("bot_updates_pending", "Updates waiting in the worker pool", self._get(pool, "pending")))
+        register(Gauge("bot_active_chats", "Chats with queued updates", self._get(pool, "active_chats")))
+        register(CounterFunc(
+            "bot_updates_dropped_total", "Updates dropped on full chat queue", self._get(pool, "dropped_total"),
+        ))
+
+        dispatcher = self._dispatcher
+        register(Gauge(
+            "vk_send_queue_size", "Messages waiting to be sent",
+            lambda: dispatcher().queue.qsize() if dispatcher() is not None else None,
+        ))
+        register(CounterFunc("vk_messages_sent_total", "Messages sent", self._get(dispatcher, "sent_total")))
+        register(CounterFunc(
+            "vk_messages_failed_total", "Messages not delivered after retries", self._get(dispatcher, "failed_total"),
+        ))
+
+        db_pool = self._db_pool
+        register(Gauge("db_pool_max_size", "Connection pool size", self._get(db_pool, "max_size")))
+        register(Gauge("db_pool_in_use", "Connections in use", self._get(db_pool, "in_use")))
+        register(Gauge("db_pool_waiting", "Coroutines waiting for a connection", self._get(db_pool, "waiting")))
+        register(CounterFunc("db_pool_acquired_total", "Connections acquired", self._get(db_pool, "acquired_total")))
+        register(CounterFunc(
+            "db_pool_timeouts_total", "Connection acquire timeouts", self._get(db_pool, "timeouts_total"),
+        ))
+        register(CounterFunc(
+            "db_pool_acquire_seconds_total", "Time spent waiting for connections",
+            self._get(db_pool, "acquire_seconds_total"),
+        ))
+
+        register(Gauge("game_active_total", "Active games in memory", lambda: len(app.store.game_state.games)))
+        register(Gauge(
+            "game_journal_pending", "Game writes waiting for the database",
+            lambda: app.store.game_state.journal.pending,
+        ))
+        register(CounterFunc(
+            "game_journal_failed_total", "Game writes failed after retries, their games are reloaded",
+            lambda: app.store.game_state.journal.failed_total,
+        ))
+        register(Gauge("game_question_timers", "Scheduled question timeouts", lambda: len(app.store.game_logic.timers)))
+
+        register(CounterFunc(
+            "http_response_cache_hits_total", "Response cache hits",
+            lambda: app.response_cache.hits if app.response_cache is not None else None,
+        ))
+        register(CounterFunc(
+            "http_response_cache_misses_total", "Response cache misses",
+            lambda: app.response_cache.misses if app.response_cache is not None else None,
+        ))
+
+    def render(self) -> str:
+        return self.registry.render()
+
+    def _worker_pool(self):
+        return self.app.store.vk_api.pool
+
+    def _dispatcher(self):
+        return self.app.store.vk_api.dispatcher
+
+    def _db_pool(self):
+        return self.app.database.pool_metrics if self.app.database is not None else None
+
+    @staticmethod
+    def _get(source: Callable, attr: str) -> Callable[[], Optional[float]]:
+        def collect() -> Optional[float]:
+            obj = source()
+            return getattr(obj, attr) if obj is not None else None
+        return collect
+
+
+def setup_monitoring(app: "Application"):
+    app.metrics = AppMetrics(app)
@@ -0,0 +1,12 @@
+import typing
+
+from app.monitoring.views import HealthView, MetricsView, ReadyView
+
+if typing.TYPE_CHECKING:
+    from app.web.app import Application
+
+
+def setup_routes(app: "Application"):
+    app.router.add_view("/metrics", MetricsView)
+    app.router.add_view("/health", HealthView)
+    app.router.add_view("/ready", ReadyView)
@@ -0,0 +1,55 @@
+import asyncio
+
+from aiohttp.web_response import Response
+
+from app.web.app import View
+from app.web.utils import error_json_response, json_response
+
+CHECK_TIMEOUT = 2  # секунд на проверку БД
+POLL_MAX_AGE = 90  # секунд без ответа long poll сервера, после которых бот считается зависшим
+
+
+class MetricsView(View):
+    async def get(self):
+        return Response(text=self.request.app.metrics.render(), content_type="text/plain", charset="utf-8")
+
+
+class HealthView(View):
+    async def get(self):
+        """ Живость процесса: цикл long poll не упал и получает ответы """
+        checks = {"long_poll": self._check_long_poll()}
+        return self._response(checks)
+
+    def _check_long_poll(self) -> bool:
+        poller = self.store.vk_api.poller
+        # бот без long poll (webhook или только админка) проверку не проходит и не проваливает
+        return poller is None or poller.is_alive(max_age=POLL_MAX_AGE)
+
+    @staticmethod
+    def _response(checks: dict) -> Response:
+        if all(checks.values()):
+            return json_response(data=checks)
+        return error_json_response(http_status=503, status="service_unavailable", message="check failed", data=checks)
+
+
+class ReadyView(HealthView):
+    async def get(self):
+        """ Готовность принимать трафик: БД доступна, активные игры восстановлены, long poll жив """
+        checks = {
+            "database": await self._check_database(),
+            # активные игры восстанавливают только процессы, которые обрабатывают обновления
+            "game_state": self.store.game_state.warmed or not self.request.app.role.handles_updates,
+            "long_poll": self._check_long_poll(),
+        }
+        return self._response(checks)
+
+    async def _check_database(self) -> bool:
+        db = self.request.app.database.db
+        if db is None:
+            return False
+        try:
+            await asyncio.wait_for(db.scalar(db.text("SELECT 1")), timeout=CHECK_TIMEOUT)
+        except Exception as e:
+            self.request.app.logger.warning("database check failed: %r", e)
+            return False
+        return True
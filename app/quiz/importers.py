@@ -0,0 +1,198 @@
+import csv
+import json
+import typing
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, List, Optional, Set, Tuple
+
+from aiohttp import StreamReader
+from marshmallow import ValidationError
+
+from app.quiz.models import Answer, Question
+from app.quiz.schemes import QuestionSchema
+from app.store.database.gino import db
+
+if typing.TYPE_CHECKING:
+    from app.store import Store
+
+# номер строки, разобранная запись, ошибка разбора
+Record = Tuple[int, Optional[Any], Optional[str]]
+
+
+async def read_ndjson(stream: StreamReader) -> AsyncIterator[Record]:
+    """ Одна строка - один вопрос в формате QuestionSchema """
+    line_no = 0
+    async for line in stream:
+        line_no += 1
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield line_no, json.loads(line), None
+        except ValueError as e:
+            yield line_no, None, str(e)
+
+
+class _LineFeed:
+    """
+        Источник строк для одного csv.reader на весь поток.
+        Пополняется по мере чтения и запоминает номер первой строки очередной записи
+    """
+
+    def __init__(self):
+        self.lines: Deque[Tuple[int, str]] = deque()
+        self.first: Optional[int] = None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if not self.lines:
+            raise StopIteration
+        line_no, line = self.lines.popleft()
+        if self.first is None:
+            self.first = line_no
+        return line
+
+    def rows(self, reader) -> Iterator[Record]:
+        """ Разбираем накопленные строки, в них только целые записи """
+        while self.lines:
+            self.first = None
+            try:
+                row = next(reader)
+            except csv.Error as e:
+                yield self.first, None, str(e)
+                continue
+            if not row or (self.first == 1 and row[0] == "title"):
+                continue
+            yield self.first, {
+                "title": row[0],
+                "theme_id": row[1] if len(row) > 1 else None,
+                "answers": [{"title": title, "is_correct": i == 0} for i, title in enumerate(row[2:])],
+            }, None
+
+
+async def read_csv(stream: StreamReader) -> AsyncIterator[Record]:
+    """
+        Строка: title,theme_id,правильный ответ,неправильный ответ[,неправильный ответ...]
+        Заголовок, начинающийся с title, пропускается.
+        Поле в кавычках может занимать несколько строк, номер записи - номер ее первой строки
+    """
+    feed = _LineFeed()
+    reader = csv.reader(feed)
+    line_no = 0
+    quotes = 0
+    async for line in stream:
+        line_no += 1
+        try:
+            feed.lines.append((line_no, line.decode()))
+        except UnicodeDecodeError as e:
+            # недочитанная запись с этой строкой уже не соберется
+            start = feed.lines[0][0] if feed.lines else line_no
+            feed.lines.clear()
+            quotes = 0
+            yield start, None, str(e)
+            continue
+        # внутри поля кавычки удваиваются, так что запись закончена при четном их числе
+        quotes += line.count(b'"')
+        if quotes % 2:
+            continue
+        quotes = 0
+        for record in feed.rows(reader):
+            yield record
+    if feed.lines:
+        yield feed.lines[0][0], None, "Unexpected end of data: unclosed quoted field."
+
+
+class QuestionImporter:
+    """
+        Потоковый импорт вопросов.
+        Каждая запись проверяется правилами QuestionSchema,
+        корректные вопросы пишутся пачками в одной транзакции,
+        по некорректным строкам собирается отчет в порядке строк
+    """
+    BATCH_SIZE = 500
+    MAX_REPORTED_ERRORS = 1000
+
+    def __init__(self, store: "Store"):
+        self.store = store
+        self.schema = QuestionSchema()
+        self.imported = 0
+        self.errors: List[Dict[str, Any]] = []
+        self.errors_total = 0
+        # ошибки строк текущей пачки: повторы заголовков в БД находятся только при записи пачки
+        self._pending_errors: List[Dict[str, Any]] = []
+
+    async def run(self, records: AsyncIterator[Record]) -> dict:
+        theme_ids = {el.id for el in await self.store.quizzes.list_themes()}
+        seen_titles: Set[str] = set()
+        batch: List[Tuple[int, Question]] = []
+        async with db.transaction():
+            async for line_no, record, error in records:
+                if error is not None:
+                    self._error(line_no, {"_schema": [error]})
+                    continue
+                question = self._validate(line_no, record, theme_ids, seen_titles)
+                if question is None:
+                    continue
+                batch.append((line_no, question))
+                if len(batch) >= self.BATCH_SIZE:
+                    await self._flush(batch)
+                    batch = []
+            await self._flush(batch)
+
+        if self.imported and self.store.quizzes.catalog.loaded:
+            # один раз перечитываем каталог вместо того, чтобы держать все вопросы загрузки в памяти
+            await self.store.quizzes.load_catalog()
+        if self.imported:
+            self.store.quizzes.invalidate_cache("questions")
+        return {
+            "imported": self.imported,
+            "errors_total": self.errors_total,
+            "errors": self.errors,
+        }
+
+    def _validate(self, line_no: int, record: Any, theme_ids: Set[int], seen_titles: Set[str]) -> Optional[Question]:
+        try:
+            data = self.schema.load(record)
+        except ValidationError as e:
+            messages = e.messages if isinstance(e.messages, dict) else {"_schema": e.messages}
+            self._error(line_no, messages)
+            return None
+        if data["theme_id"] not in theme_ids:
+            self._error(line_no, {"theme_id": ["Theme not found."]})
+            return None
+        if data["title"] in seen_titles:
+            self._error(line_no, {"title": ["Duplicate title in upload."]})
+            return None
+        seen_titles.add(data["title"])
+        return Question(
+            id=None,
+            title=data["title"],
+            theme_id=data["theme_id"],
+            answers=[Answer(title=el["title"], is_correct=el["is_correct"]) for el in data["answers"]],
+        )
+
+    async def _flush(self, batch: List[Tuple[int, Question]]) -> None:
+        if batch:
+            existing = await self.store.quizzes.list_existing_titles([el.title for _, el in batch])
+            questions = []
+            for line_no, question in batch:
+                if question.title in existing:
+                    self._error(line_no, {"title": ["Question already exists."]})
+                else:
+                    questions.append(question)
+            created = await self.store.quizzes.create_questions(questions)
+            self.imported += len(created)
+        self._report()
+
+    def _error(self, line_no: int, messages: dict) -> None:
+        self.errors_total += 1
+        # строки приходят по возрастанию, поэтому лишние поздние ошибки можно не хранить
+        if len(self.errors) + len(self._pending_errors) < self.MAX_REPORTED_ERRORS:
+            self._pending_errors.append({"line": line_no, "errors": messages})
+
+    def _report(self) -> None:
+        """ Все строки пачки обработаны, переносим их ошибки в отчет по порядку строк """
+        self._pending_errors.sort(key=lambda x: x["line"])
+        self.errors.extend(self._pending_errors[:self.MAX_REPORTED_ERRORS - len(self.errors)])
+        self._pending_errors = []
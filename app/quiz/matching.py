@@ -0,0 +1,69 @@
+import string
+
+# регистр уже сброшен casefold, ё приравниваем к е, пунктуацию заменяем пробелами
+_TABLE = str.maketrans(
+    {"ё": "е", **{ch: " " for ch in string.punctuation + "«»„“”‘’–—…№"}}
+)
+
+
+def normalize_answer(text: str) -> str:
+    """ Приводим ответ к виду для сравнения: регистр, ё, пунктуация, лишние пробелы """
+    return " ".join(text.casefold().translate(_TABLE).split())
+
+
+def within_distance(a: str, b: str, limit: int) -> bool:
+    """
+        Расстояние Левенштейна между строками не больше limit.
+        Считаем только полосу шириной 2 * limit + 1 и выходим,
+        как только вся строка матрицы превысила limit
+    """
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > limit:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    big = limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char in enumerate(a, start=1):
+        start = max(1, i - limit)
+        end = min(len(b), i + limit)
+        current = [big] * (len(b) + 1)
+        current[0] = i if i <= limit else big
+        row_min = current[0]
+        for j in range(start, end + 1):
+            cost = previous[j - 1] if b[j - 1] == char else previous[j - 1] + 1
+            value = min(cost, previous[j] + 1, current[j - 1] + 1)
+            current[j] = value if value < big else big
+            if value < row_min:
+                row_min = value
+        if row_min > limit:
+            return False
+        previous = current
+    return previous[len(b)] <= limit
+
+
+class AnswerMatcher:
+    """
+        Проверка ответа игрока с допуском опечаток.
+        Короткие ответы и ответы с цифрами сравниваются точно,
+        чтобы «1945» не засчитывался за «1946»
+    """
+
+    def __init__(self, max_typos: int = 1, min_length: int = 5):
+        self.max_typos = max_typos
+        self.min_length = min_length
+
+    def allowed_typos(self, expected: str) -> int:
+        if len(expected) < self.min_length or any(ch.isdigit() for ch in expected):
+            return 0
+        # на каждые min_length символов ответа допускаем одну опечатку
+        return min(self.max_typos, len(expected) // self.min_length)
+
+    def is_correct(self, expected: str, text: str) -> bool:
+        """ expected уже нормализован при загрузке вопроса """
+        answer = normalize_answer(text)
+        if answer == expected:
+            return True
+        limit = self.allowed_typos(expected)
+        return limit > 0 and within_distance(expected, answer, limit)
@@ -1,12 +1,13 @@
 import datetime
 import enum
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
 
+from app.quiz.matching import normalize_answer
 from app.store.database.gino import db
 from sqlalchemy_utils.types.choice import ChoiceType
 
-@dataclass
+@dataclass(slots=True)
 class Theme:
     id: Optional[int]
     title: str
@@ -19,16 +20,24 @@ class ThemeModel(db.Model):
     title = db.Column(db.String(120), unique=True)
 
 
-@dataclass
+@dataclass(slots=True)
 class Question:
     id: Optional[int]
     title: str
     theme_id: int
     answers: list["Answer"]
+    correct_answer: Optional["Answer"] = field(default=None, init=False, repr=False, compare=False)
+    # нормализованный верный ответ, с ним сравниваются ответы игроков
+    answer_key: str = field(default="", init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        # ответы вопроса не меняются, верный ищем и нормализуем один раз
+        self.correct_answer = next((el for el in self.answers if el.is_correct), None)
+        if self.correct_answer is not None:
+            self.answer_key = normalize_answer(self.correct_answer.title)
 
     def get_correct_answer(self) -> "Answer":
-        answer = list(filter(lambda x: x.is_correct, self.answers))
-        return answer[0] if len(answer) > 0 else None
+        return self.correct_answer
 
 
 class QuestionModel(db.Model):
@@ -36,7 +45,11 @@ class QuestionModel(db.Model):
 
     id = db.Column(db.Integer(), primary_key=True)
     title = db.Column(db.String(120), unique=True)
-    theme_id = db.Column(db.Integer, db.ForeignKey('themes.id', ondelete='CASCADE'), nullable=False)
+    theme_id = db.Column(db.Integer, db.ForeignKey('themes.id', ondelete='CASCADE'), nullable=False, index=True)
+
+    __table_args__ = (
+        db.Index('ix_questions_title_pattern', 'title', postgresql_ops={'title': 'text_pattern_ops'}),
+    )
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -58,42 +71,88 @@ class AnswerModel(db.Model):
     id = db.Column(db.Integer(), primary_key=True)
     title = db.Column(db.String(120))
     is_correct = db.Column(db.Boolean())
-    question_id = db.Column(db.Integer, db.ForeignKey('questions.id', ondelete='CASCADE'), nullable=False)
+    question_id = db.Column(
+        db.Integer, db.ForeignKey('questions.id', ondelete='CASCADE'), nullable=False, index=True
+    )
 
 
-@dataclass
+@dataclass(slots=True)
 class Answer:
     title: str
     is_correct: bool
 
 
-@dataclass
+@dataclass(slots=True)
 class Game:
     id: int
     chat_id: int
     status: int
     current_question_id: int
     users: list["User"]
-    questions: list[Question]
+    questions: Dict[int, Question]
     finish_question_ids: list
     started_at: datetime.datetime
     finished_at: datetime.datetime
+    question_deadline: Optional[datetime.datetime] = None
+    deck: List[int] = field(default_factory=list)
+    deck_cursor: int = 0
+    theme_id: Optional[int] = None
+    # индексы игроков и текущий лидер.
+    # Очки игроков игры меняются только через add_points и set_points, иначе get_winner устареет
+    _users_by_vk_id: Dict[int, "User"] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _positions: Dict[int, int] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _leader: Optional["User"] = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self._users_by_vk_id = {el.vk_id: el for el in self.users}
+        self._positions = {el.vk_id: i for i, el in enumerate(self.users)}
+        self.refresh_leader()
 
     def get_winner(self) -> "User":
-        users = sorted(self.users, key=lambda x: x.points, reverse=True)
-        return users[0] if len(users) > 0 else None
+        return self._leader
+
+    def get_scoreboard(self) -> list["User"]:
+        return sorted(self.users, key=lambda x: x.points, reverse=True)
 
     def get_user(self, vk_id: int) -> "User":
-        user = list(filter(lambda x: x.vk_id == vk_id, self.users))
-        return user[0] if len(user) > 0 else None
+        return self._users_by_vk_id.get(vk_id)
+
+    def add_points(self, user: "User", points: int) -> None:
+        user.points += points
+        self._update_leader(user)
+
+    def set_points(self, user: "User", points: int) -> None:
+        """ Произвольное изменение очков, например откат начисления, лидера пересчитываем заново """
+        user.points = points
+        self.refresh_leader()
+
+    def refresh_leader(self) -> None:
+        self._leader = None
+        for user in self.users:
+            self._update_leader(user)
+
+    def _update_leader(self, user: "User") -> None:
+        """
+            В add_points очки только растут, поэтому лидера достаточно сравнить с игроком, которому их начислили.
+            При равенстве очков лидирует игрок, который раньше в списке игры
+        """
+        leader = self._leader
+        if leader is None or user.points > leader.points or (
+                user.points == leader.points and self._positions[user.vk_id] < self._positions[leader.vk_id]
+        ):
+            self._leader = user
 
     def get_current_question(self) -> Question:
-        question = list(filter(lambda x: x.id == self.current_question_id, self.questions))
-        return question[0] if len(question) > 0 else None
+        return self.questions.get(self.current_question_id)
 
-    def get_question_for_chat(self) -> Question:
-        question = list(filter(lambda x: x.id not in self.finish_question_ids, self.questions))
-        return question[0] if len(question) > 0 else None
+    def draw_question(self) -> Optional[Question]:
+        """ Берем следующий вопрос колоды и сдвигаем курсор, удаленные из каталога вопросы пропускаем """
+        while self.deck_cursor < len(self.deck):
+            question = self.questions.get(self.deck[self.deck_cursor])
+            self.deck_cursor += 1
+            if question is not None:
+                return question
+        return None
 
 
 class StatusGame(enum.Enum):
@@ -106,13 +165,28 @@ class GameModel(db.Model):
     __tablename__ = "game"
 
     id = db.Column(db.Integer(), primary_key=True)
-    chat_id = db.Column(db.Integer(), nullable=False)
+    chat_id = db.Column(db.Integer(), nullable=False, index=True)
     question_ids = db.Column(db.ARRAY(db.Integer))
     status = db.Column(ChoiceType(StatusGame, impl=db.Integer()))
     current_question_id = db.Column(db.Integer, db.ForeignKey('questions.id', ondelete='SET NULL'), nullable=True)
     started_at = db.Column(db.DateTime, server_default='now()')
     finished_at = db.Column(db.DateTime, nullable=True)
-    winner_user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='SET NULL'), nullable=True)
+    winner_user_id = db.Column(
+        db.Integer, db.ForeignKey('user.id', ondelete='SET NULL'), nullable=True, index=True
+    )
+    question_deadline = db.Column(db.DateTime, nullable=True)
+    # перемешанные id вопросов игры и позиция следующего вопроса
+    question_deck = db.Column(db.ARRAY(db.Integer), nullable=True)
+    deck_cursor = db.Column(db.Integer, nullable=False, server_default='0', default=0)
+    theme_id = db.Column(db.Integer, db.ForeignKey('themes.id', ondelete='SET NULL'), nullable=True)
+
+    __table_args__ = (
+        # в чате не больше одной незавершенной игры, по этому же индексу ищется активная игра
+        db.Index(
+            'ux_game_active_chat_id', 'chat_id', unique=True,
+            postgresql_where=db.text(f'status <> {StatusGame.FINISHED.value}'),
+        ),
+    )
 
     def __init__(self, **kw):
         super().__init__(**kw)
@@ -137,7 +211,7 @@ class GameModel(db.Model):
         self._scores.add(score)
 
 
-@dataclass
+@dataclass(slots=True)
 class User:
     id: int
     vk_id: int
@@ -215,8 +289,48 @@ class ScoreModel(db.Model):
     id = db.Column(db.Integer(), primary_key=True)
     count = db.Column(db.Integer(), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='SET NULL'), nullable=False)
-    game_id = db.Column(db.Integer, db.ForeignKey('game.id', ondelete='CASCADE'), nullable=False)
+    game_id = db.Column(db.Integer, db.ForeignKey('game.id', ondelete='CASCADE'), nullable=False, index=True)
 
     __table_args__ = (
         db.UniqueConstraint('user_id', 'game_id'),
     )
+
+
+@dataclass
+class FinishedGame:
+    id: int
+    chat_id: int
+    started_at: datetime.datetime
+    finished_at: datetime.datetime
+    winner_vk_id: Optional[int]
+    winner_points: Optional[int]
+
+    @property
+    def duration(self) -> datetime.timedelta:
+        return self.finished_at - self.started_at
+
+
+@dataclass
+class GameStats:
+    games_total: int
+    duration_total: Optional[datetime.timedelta]
+    duration_average: Optional[datetime.timedelta]
+    games_average_per_day: float
+    winners_top: list[Winner]
+
+
+class GameStatsDailyModel(db.Model):
+    """ Накопительная статистика завершенных игр по дням начала игры """
+    __tablename__ = "game_stats_daily"
+
+    day = db.Column(db.Date(), primary_key=True)
+    games_count = db.Column(db.Integer(), nullable=False, server_default='0')
+    duration_total = db.Column(db.Interval(), nullable=False, server_default='0')
+
+
+class WinnerStatsModel(db.Model):
+    """ Накопительное число побед игрока """
+    __tablename__ = "winner_stats"
+
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+    win_count = db.Column(db.Integer(), nullable=False, server_default='0')
@@ -5,6 +5,7 @@ from app.quiz.views import (
     ThemeListView,
     QuestionAddView,
     QuestionListView,
+    QuestionImportView,
 )
 
 if typing.TYPE_CHECKING:
@@ -16,3 +17,4 @@ def setup_routes(app: "Application"):
     app.router.add_view("/quiz.list_themes", ThemeListView)
     app.router.add_view("/quiz.add_question", QuestionAddView)
     app.router.add_view("/quiz.list_questions", QuestionListView)
+    app.router.add_view("/quiz.import_questions", QuestionImportView)
@@ -1,4 +1,4 @@
-from marshmallow import Schema, fields
+from marshmallow import Schema, ValidationError, fields, validate, validates_schema
 
 
 class ThemeSchema(Schema):
@@ -8,13 +8,21 @@ class ThemeSchema(Schema):
 
 class QuestionSchema(Schema):
     id = fields.Int(required=False)
-    title = fields.Str(required=True)
+    title = fields.Str(required=True, validate=validate.Length(min=1, max=120))
     theme_id = fields.Int(required=True)
     answers = fields.Nested("AnswerSchema", many=True, required=True)
 
+    @validates_schema
+    def validate_answers(self, data, **kwargs):
+        answers = data["answers"]
+        if len(answers) < 2:
+            raise ValidationError("Question must have at least two answers.", "answers")
+        if len([el for el in answers if el["is_correct"]]) != 1:
+            raise ValidationError("Question must have exactly one correct answer.", "answers")
+
 
 class AnswerSchema(Schema):
-    title = fields.Str(required=True)
+    title = fields.Str(required=True, validate=validate.Length(min=1, max=120))
     is_correct = fields.Bool(required=True)
 
 
@@ -26,5 +34,24 @@ class ThemeIdSchema(Schema):
     theme_id = fields.Int()
 
 
+class ListQuestionQuerySchema(Schema):
+    theme_id = fields.Int()
+    after_id = fields.Int()
+    limit = fields.Int(missing=50, validate=validate.Range(min=1, max=500))
+    title_prefix = fields.Str()
+    with_answers = fields.Bool(missing=False)
+
+
 class ListQuestionSchema(Schema):
     questions = fields.Nested(QuestionSchema, many=True)
+
+
+class ImportErrorSchema(Schema):
+    line = fields.Int()
+    errors = fields.Dict()
+
+
+class ImportQuestionsSchema(Schema):
+    imported = fields.Int()
+    errors_total = fields.Int()
+    errors = fields.Nested(ImportErrorSchema, many=True)
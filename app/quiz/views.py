@@ -1,18 +1,30 @@
-from aiohttp.web_exceptions import HTTPConflict, HTTPNotFound, HTTPBadRequest
+from aiohttp.web_exceptions import HTTPConflict, HTTPNotFound
 from aiohttp_apispec import request_schema, response_schema, querystring_schema
 
+from app.quiz.importers import QuestionImporter, read_csv, read_ndjson
 from app.quiz.models import Answer
 from app.quiz.schemes import (
     ThemeSchema,
     ThemeListSchema,
     QuestionSchema,
-    ThemeIdSchema,
+    ListQuestionQuerySchema,
     ListQuestionSchema,
+    ImportQuestionsSchema,
 )
 from app.web.app import View
+from app.web.cache import cached_response
 from app.web.mixins import AuthRequiredMixin
+from app.web.serializers import compile_serializer
 from app.web.utils import json_response
 
+# схемы создаются один раз, списки сериализуются собранными заранее функциями
+theme_schema = ThemeSchema()
+question_schema = QuestionSchema()
+import_questions_schema = ImportQuestionsSchema()
+dump_theme_list = compile_serializer(ThemeListSchema())
+dump_question_list = compile_serializer(ListQuestionSchema())
+dump_question_list_without_answers = compile_serializer(ListQuestionSchema(exclude=("questions.answers",)))
+
 
 class ThemeAddView(AuthRequiredMixin, View):
     @request_schema(ThemeSchema)
@@ -23,14 +35,15 @@ class ThemeAddView(AuthRequiredMixin, View):
         if existing_theme:
             raise HTTPConflict
         theme = await self.store.quizzes.create_theme(title=title)
-        return json_response(data=ThemeSchema().dump(theme))
+        return json_response(data=theme_schema.dump(theme))
 
 
 class ThemeListView(AuthRequiredMixin, View):
     @response_schema(ThemeListSchema)
+    @cached_response("themes")
     async def get(self):
         themes = await self.store.quizzes.list_themes()
-        return json_response(data=ThemeListSchema().dump({"themes": themes}))
+        return json_response(data=dump_theme_list({"themes": themes}))
 
 
 class QuestionAddView(AuthRequiredMixin, View):
@@ -47,40 +60,52 @@ class QuestionAddView(AuthRequiredMixin, View):
         if not theme:
             raise HTTPNotFound
 
-        if len(self.data["answers"]) < 2:
-            raise HTTPBadRequest
-
-        parsed_answers = []
-        correct = []
-        for answer in self.data["answers"]:
-            answer = Answer(title=answer["title"], is_correct=answer["is_correct"])
-            if answer.is_correct and True in correct:
-                raise HTTPBadRequest
-            correct.append(answer.is_correct)
-            parsed_answers.append(answer)
-
-        if not any(correct):
-            raise HTTPBadRequest
-
+        # число ответов и единственный верный ответ проверяет QuestionSchema
+        parsed_answers = [
+            Answer(title=answer["title"], is_correct=answer["is_correct"])
+            for answer in self.data["answers"]
+        ]
         question = await self.store.quizzes.create_question(
             title=title,
             theme_id=theme_id,
             answers=parsed_answers,
         )
-        return json_response(data=QuestionSchema().dump(question))
+        return json_response(data=question_schema.dump(question))
 
 
 class QuestionListView(AuthRequiredMixin, View):
-    @querystring_schema(ThemeIdSchema)
+    @querystring_schema(ListQuestionQuerySchema)
     @response_schema(ListQuestionSchema)
+    @cached_response("questions")
     async def get(self):
-        questions = await self.store.quizzes.list_questions(
-            theme_id=self.data.get("theme_id")
+        with_answers = self.data["with_answers"]
+        questions = await self.store.quizzes.page_questions(
+            after_id=self.data.get("after_id"),
+            limit=self.data["limit"],
+            theme_id=self.data.get("theme_id"),
+            title_prefix=self.data.get("title_prefix"),
+            with_answers=with_answers,
         )
+        dump = dump_question_list if with_answers else dump_question_list_without_answers
         return json_response(
-            data=ListQuestionSchema().dump(
+            data=dump(
                 {
                     "questions": questions,
                 }
             )
         )
+
+
+class QuestionImportView(AuthRequiredMixin, View):
+    @response_schema(ImportQuestionsSchema)
+    async def post(self):
+        """
+            Массовая загрузка вопросов.
+            Тело читается построчно: NDJSON по умолчанию, CSV при Content-Type text/csv
+        """
+        if self.request.content_type == "text/csv":
+            records = read_csv(self.request.content)
+        else:
+            records = read_ndjson(self.request.content)
+        result = await QuestionImporter(self.store).run(records)
+        return json_response(data=import_questions_schema.dump(result))
@@ -12,6 +12,7 @@ class Store:
         from app.store.admin.accessor import AdminAccessor
         from app.store.quiz.accessor import QuizAccessor
         from app.store.quiz.accessor import GameAccessor
+        from app.store.game_state.accessor import GameStateAccessor
         from app.store.vk_api.accessor import VkApiAccessor
         from app.store.bot.accessor import UserAccessor
         from app.store.bot.game_logic import GameLogic
@@ -19,6 +20,7 @@ class Store:
         self.quizzes = QuizAccessor(app)
         self.users = UserAccessor(app)
         self.game = GameAccessor(app)
+        self.game_state = GameStateAccessor(app)
         self.admins = AdminAccessor(app)
         self.vk_api = VkApiAccessor(app)
         self.bots_manager = BotManager(app)
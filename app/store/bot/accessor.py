@@ -1,4 +1,4 @@
-from typing import List
+from typing import Dict, List
 from typing import Optional
 
 from sqlalchemy.dialects.postgresql import insert
@@ -9,6 +9,9 @@ from app.quiz.models import (
 
 
 class UserAccessor(BaseAccessor):
+    # 3 параметра на строку, держимся далеко от лимита asyncpg в 32767 параметров
+    UPSERT_CHUNK_SIZE = 1000
+
     async def get_user_by_vk_id(self, vk_id: str) -> Optional[User]:
         """ Достаем юзера из БД по vk_id """
         res = await UserModel.query.where(UserModel.vk_id == vk_id).gino.first()
@@ -40,14 +43,34 @@ class UserAccessor(BaseAccessor):
             points=0,
         )
 
+    async def upsert_users(self, users: List[User]) -> Dict[int, User]:
+        """
+            Создаем либо обновляем юзеров одним запросом на пачку
+            Возвращаем юзеров из БД по vk_id в порядке входного списка
+        """
+        rows = {}
+        for user in users:
+            # один vk_id не может попасть в INSERT ... ON CONFLICT дважды
+            rows[user.vk_id] = dict(vk_id=user.vk_id, first_name=user.first_name, last_name=user.last_name)
+        rows = list(rows.values())
+
+        created = {}
+        for start in range(0, len(rows), self.UPSERT_CHUNK_SIZE):
+            stmt = insert(UserModel).values(rows[start:start + self.UPSERT_CHUNK_SIZE])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[UserModel.vk_id],
+                set_=dict(first_name=stmt.excluded.first_name, last_name=stmt.excluded.last_name)
+            ).returning(*UserModel)
+            for res in await stmt.gino.model(UserModel).all():
+                created[res.vk_id] = User(
+                    id=res.id,
+                    vk_id=res.vk_id,
+                    first_name=res.first_name,
+                    last_name=res.last_name,
+                    points=0,
+                )
+        return {row["vk_id"]: created[row["vk_id"]] for row in rows}
+
     async def get_users(self, users: List[User]) -> List[User]:
         """ Создаем либо вытаскиваем из спиоск юзеров БД """
-        result = []
-        for user in users:
-            created_user = await self.create_user(
-                vk_id=user.vk_id,
-                first_name=user.first_name,
-                last_name=user.last_name
-            )
-            result.append(created_user)
-        return result
+        return list((await self.upsert_users(users)).values())
@@ -1,16 +1,17 @@
 class BotMessage:
-    WRONG_ANSWER = 'Неверный ответ %0A'
-    CORRECT_ANSWER = 'Правильный ответ! %0A'
-    IS_NOT_ADMIN = 'Назначьте бота администратором %0A'
-    HAVE_NOT_QUESTIONS = 'В боте отсутствуют вопросы %0A'
-    ALREADY_STARTED = 'Игра уже началась %0A'
-    ALREADY_FINISHED = 'Игра уже завершена %0A'
-    FINISHED = 'Игра завершена %0A'
-    START_GAME_TEXT = 'Игра началась. Первый вопрос: {question_title} %0A'
-    INVITE_TEXT = "Вы пригласили бота 'Своя игра' %0A" \
-                  "Сделайте бота админом и воспользуетесь кнопками ниже что бы начать играть %0A" \
-                  "Кто первый отвечает тому начисляется 100 очков %0A" \
-                  "В конце подводится результат %0A"
-    RESULT_GAME = 'Результаты текущей игры № {game_id} %0A'
-    NO_RESULT_GAME = 'Нет текущей игры %0A'
-    NO_ANSWER_FOR_TIME = 'Время на ответ вышло %0A'
+    WRONG_ANSWER = 'Неверный ответ\n'
+    CORRECT_ANSWER = 'Правильный ответ!\n'
+    ALREADY_ANSWERED = 'На этот вопрос уже ответили\n'
+    IS_NOT_ADMIN = 'Назначьте бота администратором\n'
+    HAVE_NOT_QUESTIONS = 'В боте отсутствуют вопросы\n'
+    ALREADY_STARTED = 'Игра уже началась\n'
+    ALREADY_FINISHED = 'Игра уже завершена\n'
+    FINISHED = 'Игра завершена\n'
+    START_GAME_TEXT = 'Игра началась. Первый вопрос: {question_title}\n'
+    INVITE_TEXT = "Вы пригласили бота 'Своя игра'\n" \
+                  "Сделайте бота админом и воспользуетесь кнопками ниже что бы начать играть\n" \
+                  "Кто первый отвечает тому начисляется 100 очков\n" \
+                  "В конце подводится результат\n"
+    RESULT_GAME = 'Результаты текущей игры № {game_id}\n'
+    NO_RESULT_GAME = 'Нет текущей игры\n'
+    NO_ANSWER_FOR_TIME = 'Время на ответ вышло\n'
@@ -1,7 +1,12 @@
-import asyncio
+import datetime
+from functools import partial
+from logging import getLogger
 
-from app.quiz.models import StatusGame, Game, User
+from app.cluster.roles import Role
+from app.quiz.matching import AnswerMatcher
+from app.quiz.models import StatusGame, Game, User, Question
 from app.store.bot.consts import BotMessage
+from app.store.bot.timers import TimerScheduler
 from app.store.vk_api.accessor import Keyboard, BotIsNotAdminError
 from app.store.vk_api.dataclasses import Message, Update
 
@@ -12,9 +17,18 @@ class GameLogic:
 
     def __init__(self, app: "Application"):
         self.app = app
+        self.timers = TimerScheduler(getLogger("timers"))
+        self.matcher = AnswerMatcher(
+            max_typos=app.config.bot.answer_max_typos,
+            min_length=app.config.bot.answer_typo_min_length,
+        )
+        app.on_cleanup.append(self.disconnect)
+
+    async def disconnect(self, app: "Application"):
+        await self.timers.close()
 
     async def action_invite(self, update: Update) -> bool:
-        await self.app.store.vk_api.send_message(
+        self.app.store.vk_api.send_message(
             Message(
                 peer_id=update.object.peer_id,
                 text=BotMessage.INVITE_TEXT
@@ -24,7 +38,7 @@ class GameLogic:
         return True
 
     async def already_started(self, update: Update) -> bool:
-        await self.app.store.vk_api.send_message(
+        self.app.store.vk_api.send_message(
             Message(
                 peer_id=update.object.peer_id,
                 text=BotMessage.ALREADY_STARTED
@@ -33,7 +47,7 @@ class GameLogic:
         return True
 
     async def already_finished(self, update: Update) -> bool:
-        await self.app.store.vk_api.send_message(
+        self.app.store.vk_api.send_message(
             Message(
                 peer_id=update.object.peer_id,
                 text=BotMessage.ALREADY_FINISHED
@@ -42,8 +56,9 @@ class GameLogic:
         return True
 
     async def action_finish_game(self, update: Update, game: Game) -> bool:
-        await self.app.store.game.set_status_for_game(game=game, status=StatusGame.FINISHED)
-        await self.app.store.vk_api.send_message(
+        self.timers.cancel(game.chat_id)
+        self.app.store.game_state.finish_game(game=game)
+        self.app.store.vk_api.send_message(
             Message(
                 peer_id=update.object.peer_id,
                 text=BotMessage.FINISHED
@@ -52,25 +67,36 @@ class GameLogic:
         return True
 
     async def update_game_without_answer(self, game: Game) -> Game:
-        await self.app.store.game.add_finished_question_ids_for_game(
-            game_id=game.id,
-            current_question_ids=game.finish_question_ids,
-            new_finished_question_id=game.current_question_id
-        )
-        game.finish_question_ids.append(game.current_question_id)
+        self.app.store.game_state.finish_question(game=game)
         return game
 
-    async def check_time_question(self, update: Update, question_id: int, chat_id: int) -> bool:
-        await asyncio.sleep(self.TIME_FOR_QUESTION)
-        active_game = await self.app.store.game.get_game_by_chat_id(chat_id=chat_id)
+    def question_deadline(self) -> datetime.datetime:
+        return datetime.datetime.utcnow() + datetime.timedelta(seconds=self.TIME_FOR_QUESTION)
+
+    def set_question(self, game: Game, question: Question) -> None:
+        """ Делаем вопрос текущим и заводим таймер на ответ, прежний таймер чата отменяется """
+        self.app.store.game_state.set_current_question(
+            game=game, question_id=question.id, deadline=self.question_deadline()
+        )
+        self.schedule_question_timeout(game)
+
+    def schedule_question_timeout(self, game: Game) -> None:
+        self.timers.schedule(
+            key=game.chat_id,
+            deadline=game.question_deadline,
+            callback=partial(self.check_time_question, question_id=game.current_question_id, chat_id=game.chat_id),
+        )
+
+    async def check_time_question(self, question_id: int, chat_id: int) -> bool:
+        active_game = await self.app.store.game_state.get_game(chat_id=chat_id)
         if active_game:
             current_question = active_game.get_current_question()
             # если до сих пор текущий вопрос тот же, переходим к следующему вопросу
             if current_question is not None and question_id == current_question.id:
                 game = await self.update_game_without_answer(game=active_game)
-                text_message = await self.next_question(update=update, game=game, answered=False)
-                text_message = f'Правильный ответ был - {current_question.get_correct_answer().title} %0A' + text_message
-                await self.app.store.vk_api.send_message(
+                text_message = await self.next_question(update=None, game=game, answered=False)
+                text_message = f'Правильный ответ был - {current_question.get_correct_answer().title}\n' + text_message
+                self.app.store.vk_api.send_message(
                     Message(
                         peer_id=chat_id,
                         text=text_message,
@@ -91,28 +117,23 @@ class GameLogic:
             bot_is_admin = False
             text_message = BotMessage.IS_NOT_ADMIN
 
-        list_questions = await self.app.store.quizzes.list_questions()
-        if len(list_questions) == 0:
+        if self.app.role.name == Role.WORKER:
+            # вопросы добавляются через API в другом процессе
+            catalog = await self.app.store.quizzes.sync_catalog()
+        else:
+            catalog = await self.app.store.quizzes.get_catalog()
+        if len(catalog) == 0:
             exist_questions = False
             text_message = BotMessage.HAVE_NOT_QUESTIONS
 
         if bot_is_admin and exist_questions:
-            game = await self.app.store.game.create_game(chat_id=chat_id, users=users)
-            current_question = game.get_question_for_chat()
-            await self.app.store.game.set_current_question_for_game(question_id=current_question.id,
-                                                                    game_id=game.id)
+            game = await self.app.store.game_state.start_game(chat_id=chat_id, users=users)
+            current_question = game.draw_question()
+            self.set_question(game=game, question=current_question)
 
             text_message = BotMessage.START_GAME_TEXT.format(question_title=current_question.title)
-            # запускаем в фоне проверку если выйдет время на ответ
-            asyncio.create_task(
-                self.check_time_question(
-                    update=update,
-                    question_id=current_question.id,
-                    chat_id=chat_id
-                )
-            )
 
-        await self.app.store.vk_api.send_message(
+        self.app.store.vk_api.send_message(
             Message(
                 peer_id=update.object.peer_id,
                 text=text_message,
@@ -125,10 +146,9 @@ class GameLogic:
         text_message = BotMessage.NO_RESULT_GAME
         if game is not None and game.status == StatusGame.STARTED:
             text_message = BotMessage.RESULT_GAME.format(game_id=game.id)
-            user_scores = await self.app.store.game.get_user_score_by_game(game_id=game.id)
-            for i, user in enumerate(user_scores):
-                text_message += f'%{i}. Игрок {user.first_name}: {user.points} очков %0A'
-        await self.app.store.vk_api.send_message(
+            for i, user in enumerate(game.get_scoreboard(), start=1):
+                text_message += f'{i}. Игрок {user.first_name}: {user.points} очков\n'
+        self.app.store.vk_api.send_message(
             Message(
                 peer_id=update.object.peer_id,
                 text=text_message,
@@ -138,62 +158,62 @@ class GameLogic:
         return True
 
     async def next_question(self, update: Update, game: Game, answered: bool = True, user: User = None) -> str:
-        current_question = game.get_question_for_chat()
-        if current_question:
-            # если еще остались вопросы берем следующий
-            await self.app.store.game.set_current_question_for_game(
-                question_id=current_question.id,
-                game_id=game.id
+        answered_question_id = game.current_question_id
+        current_question = game.draw_question()
+        if answered and user:
+            # ответ, очки и переход к следующему вопросу записываются вместе, о результате объявляем после записи
+            won = await self.app.store.game_state.record_correct_answer(
+                game=game,
+                user=user,
+                points=self.WIN_SCORE,
+                question_id=answered_question_id,
+                next_question_id=current_question.id if current_question else None,
+                deadline=self.question_deadline() if current_question else None,
             )
+            if not won:
+                # игра уже перечитана из БД вместе с таймером текущего вопроса
+                return f"{update.object.body} - {BotMessage.ALREADY_ANSWERED}"
+        if current_question:
+            # если еще остались вопросы берем следующий, таймер переставляется на новый вопрос
+            if answered and user:
+                self.schedule_question_timeout(game)
+            else:
+                self.set_question(game=game, question=current_question)
             if answered and user:
                 text_message = f"{update.object.body} - {BotMessage.CORRECT_ANSWER}" \
-                               f" {user.first_name} зачислено {self.WIN_SCORE} баллов. %0A" \
-                               f"Следующий вопрос '{current_question.title}' %0A"
+                               f" {user.first_name} зачислено {self.WIN_SCORE} баллов.\n" \
+                               f"Следующий вопрос '{current_question.title}'\n"
             else:
-                text_message = BotMessage.NO_ANSWER_FOR_TIME + f"Следующий вопрос '{current_question.title}' %0A"
-
-            # запускаем в фоне проверку на время для следующего вопроса
-            asyncio.create_task(
-                self.check_time_question(
-                    update=update,
-                    question_id=current_question.id,
-                    chat_id=game.chat_id
-                )
-            )
+                text_message = BotMessage.NO_ANSWER_FOR_TIME + f"Следующий вопрос '{current_question.title}'\n"
         else:
             # вопросов не осталось завершаем игру
             if answered and user:
-                text_message = f"Правильный ответ! %0A {user.first_name} зачислено {self.WIN_SCORE} баллов. %0A"
+                text_message = f"Правильный ответ!\n {user.first_name} зачислено {self.WIN_SCORE} баллов.\n"
             else:
                 text_message = BotMessage.NO_ANSWER_FOR_TIME
-            text_message += f"Игра завершена, вопросов не осталось %0A" \
-                            f"Результаты: %0A"
-            user_scores = await self.app.store.game.get_user_score_by_game(game_id=game.id)
-            for i, user in enumerate(user_scores, start=1):
-                text_message += f'{i}. Игрок {user.first_name}: {user.points} очков %0A'
+            text_message += f"Игра завершена, вопросов не осталось\n" \
+                            f"Результаты:\n"
+            for i, user in enumerate(game.get_scoreboard(), start=1):
+                text_message += f'{i}. Игрок {user.first_name}: {user.points} очков\n'
             user_winner = game.get_winner()
-            await self.app.store.game.set_status_for_game(
-                status=StatusGame.FINISHED,
+            self.timers.cancel(game.chat_id)
+            self.app.store.game_state.finish_game(
                 game=game,
-                winner_user_id=user_winner.id,
+                winner_user_id=user_winner.id if user_winner else None,
             )
         return text_message
 
     async def action_check_answer(self, update: Update, game: Game) -> bool:
         current_question = game.get_current_question()
-        correct_answer = current_question.get_correct_answer()
         user = game.get_user(vk_id=update.object.user_id)
-        user_answer = update.object.body
-        is_correct = correct_answer.title.lower() == user_answer.lower()
+        is_correct = self.matcher.is_correct(current_question.answer_key, update.object.body)
         if is_correct:
             # Если ответ верный обновляем игру и записываем очки юзеру
-            user.points += self.WIN_SCORE
-            await self.app.store.game.create_level_game(game=game, user=user)
             text_message = await self.next_question(update=update, game=game, user=user, answered=True)
         else:
             text_message = f'{update.object.body} - {BotMessage.WRONG_ANSWER}'
 
-        await self.app.store.vk_api.send_message(
+        self.app.store.vk_api.send_message(
             Message(
                 peer_id=update.object.peer_id,
                 text=text_message,
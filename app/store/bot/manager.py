@@ -15,10 +15,22 @@ class BotManager:
         self.logger = getLogger("handler")
 
     async def handle_update(self, update: Update) -> bool:
+        """ Обрабатываем обновление, время обработки пишем в метрики по действию """
+        if not update:
+            return False
+        action = update.action or "message"
+        try:
+            with self.app.metrics.handler_seconds.time(action):
+                return await self._handle_update(update)
+        except Exception:
+            self.app.metrics.handler_errors_total.inc(action)
+            raise
+
+    async def _handle_update(self, update: Update) -> bool:
         if update:
             chat_id = update.object.peer_id
             sent_answer = False
-            active_game = await self.app.store.game.get_game_by_chat_id(chat_id=chat_id)
+            active_game = await self.app.store.game_state.get_game(chat_id=chat_id)
             if active_game is None:
                 if update.action == UpdateStatus.INVITE_CHAT:
                     # бота пригласили в чат
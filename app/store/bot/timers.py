@@ -0,0 +1,110 @@
+import asyncio
+import datetime
+import heapq
+import itertools
+from asyncio import Event, Task
+from logging import Logger
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+Callback = Callable[[], Awaitable]
+
+
+class Timer:
+    __slots__ = ("deadline", "callback", "cancelled")
+
+    def __init__(self, deadline: float, callback: Callback):
+        self.deadline = deadline
+        self.callback = callback
+        self.cancelled = False
+
+
+class TimerScheduler:
+    """
+        Таймеры на куче с одной фоновой задачей на все таймеры.
+        На каждый ключ не больше одного таймера, отмена O(1):
+        таймер только помечается отмененным и выбрасывается из кучи позже
+    """
+
+    def __init__(self, logger: Logger):
+        self.logger = logger
+        self._heap: List[Tuple[float, int, Hashable, Timer]] = []
+        self._timers: Dict[Hashable, Timer] = {}
+        self._counter = itertools.count()
+        self._cancelled = 0
+        self._wakeup = Event()
+        self._task: Optional[Task] = None
+        self._running: Set[Task] = set()
+
+    def __len__(self) -> int:
+        return len(self._timers)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._timers
+
+    def schedule(self, key: Hashable, deadline: datetime.datetime, callback: Callback) -> None:
+        """ Ставим таймер на момент deadline (utc), прежний таймер ключа отменяется """
+        self.cancel(key)
+        loop = asyncio.get_running_loop()
+        when = loop.time() + (deadline - datetime.datetime.utcnow()).total_seconds()
+        timer = Timer(deadline=when, callback=callback)
+        self._timers[key] = timer
+        heapq.heappush(self._heap, (when, next(self._counter), key, timer))
+        if self._heap[0][3] is timer:
+            self._wakeup.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def cancel(self, key: Hashable) -> None:
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancelled = True
+            self._cancelled += 1
+            if self._cancelled > len(self._heap) // 2:
+                self._compact()
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for task in list(self._running):
+            task.cancel()
+        self._heap = []
+        self._timers = {}
+        self._cancelled = 0
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            self._wakeup.clear()
+            self._drop_cancelled()
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+            timeout = self._heap[0][0] - loop.time()
+            if timeout > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            _, _, key, timer = heapq.heappop(self._heap)
+            del self._timers[key]
+            task = asyncio.create_task(self._fire(timer))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _fire(self, timer: Timer) -> None:
+        try:
+            await timer.callback()
+        except Exception as e:
+            self.logger.error("Exception", exc_info=e)
+
+    def _drop_cancelled(self) -> None:
+        while self._heap and self._heap[0][3].cancelled:
+            heapq.heappop(self._heap)
+            self._cancelled -= 1
+
+    def _compact(self) -> None:
+        self._heap = [el for el in self._heap if not el[3].cancelled]
+        heapq.heapify(self._heap)
+        self._cancelled = 0
@@ -1,6 +1,7 @@
 import gino
 from gino.api import Gino
 from app.store.database.gino import db
+from app.store.database.pool import PoolMetrics
 from app.admin.models import *
 from app.quiz.models import *
 from sqlalchemy.engine.url import URL
@@ -12,8 +13,10 @@ class Database:
     def __init__(self, app: "Application"):
         self.app = app
         self.db: Optional[Gino] = None
+        self.pool_metrics = PoolMetrics()
 
     async def connect(self, *_, **kw):
+        config = self.app.config.database
         self._engine = await gino.create_engine(
             URL(
                 drivername="asyncpg",
@@ -23,9 +26,14 @@ class Database:
                 password=self.app.config.database.password,
                 port=self.app.config.database.port,
             ),
-            min_size=1,
-            max_size=1,
+            min_size=config.pool_min_size,
+            max_size=config.pool_max_size,
+            max_queries=config.max_queries,
+            max_inactive_connection_lifetime=config.max_inactive_connection_lifetime,
+            statement_cache_size=config.statement_cache_size,
         )
+        self.pool_metrics = PoolMetrics(max_size=config.pool_max_size)
+        self.pool_metrics.instrument(self._engine, acquire_timeout=config.acquire_timeout)
         self.db = db
         self.db.bind = self._engine
 
@@ -0,0 +1,83 @@
+import asyncio
+import time
+from typing import Any, Optional
+
+
+class PoolMetrics:
+    """
+        Метрики загрузки пула соединений:
+        ожидающие, занятые соединения и время получения соединения
+    """
+
+    def __init__(self, max_size: int = 0):
+        self.max_size = max_size
+        self.in_use = 0
+        self.waiting = 0
+        self.acquired_total = 0
+        self.timeouts_total = 0
+        self.acquire_seconds_total = 0.0
+        self.acquire_seconds_max = 0.0
+
+    def instrument(self, engine: Any, acquire_timeout: Optional[float] = None) -> None:
+        """ Подменяем пул движка gino на прокси, сам пул asyncpg не трогаем """
+        engine._pool = InstrumentedPool(engine._pool, self, acquire_timeout=acquire_timeout)
+
+    @property
+    def acquire_seconds_average(self) -> float:
+        if not self.acquired_total:
+            return 0.0
+        return self.acquire_seconds_total / self.acquired_total
+
+    def snapshot(self) -> dict:
+        return {
+            "max_size": self.max_size,
+            "in_use": self.in_use,
+            "waiting": self.waiting,
+            "acquired_total": self.acquired_total,
+            "timeouts_total": self.timeouts_total,
+            "acquire_seconds_average": self.acquire_seconds_average,
+            "acquire_seconds_max": self.acquire_seconds_max,
+        }
+
+    def _observe(self, seconds: float) -> None:
+        self.acquired_total += 1
+        self.acquire_seconds_total += seconds
+        self.acquire_seconds_max = max(self.acquire_seconds_max, seconds)
+
+
+class InstrumentedPool:
+    """
+        Прокси пула диалекта gino.
+        acquire/release замеряются, остальное уходит в настоящий пул
+    """
+
+    def __init__(self, pool: Any, metrics: PoolMetrics, acquire_timeout: Optional[float] = None):
+        self._pool = pool
+        self._metrics = metrics
+        self._acquire_timeout = acquire_timeout
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._pool, name)
+
+    async def acquire(self, *, timeout: Optional[float] = None):
+        metrics = self._metrics
+        metrics.waiting += 1
+        started = time.monotonic()
+        try:
+            connection = await self._pool.acquire(
+                timeout=timeout if timeout is not None else self._acquire_timeout
+            )
+        except asyncio.TimeoutError:
+            metrics.timeouts_total += 1
+            raise
+        finally:
+            metrics.waiting -= 1
+        metrics._observe(time.monotonic() - started)
+        metrics.in_use += 1
+        return connection
+
+    async def release(self, connection) -> None:
+        try:
+            await self._pool.release(connection)
+        finally:
+            self._metrics.in_use -= 1
@@ -0,0 +1,202 @@
+import datetime
+import typing
+from functools import partial
+from typing import Dict, List, Optional, Set
+
+from app.base.base_accessor import BaseAccessor
+from app.quiz.models import Game, StatusGame, User
+from app.store.game_state.journal import WriteBehindJournal
+
+if typing.TYPE_CHECKING:
+    from app.web.app import Application
+
+
+class GameStateAccessor(BaseAccessor):
+    """
+        Реестр активных игр по chat_id.
+        Держит игры в памяти и является источником правды для бота,
+        изменения попадают в БД через журнал отложенной записи.
+        Игра, запись которой не удалась, помечается устаревшей и перечитывается из БД
+    """
+
+    def __init__(self, app: "Application", *args, **kwargs):
+        super().__init__(app, *args, **kwargs)
+        self.journal = WriteBehindJournal(self.logger, on_failure=self._mark_stale)
+        self._games: Dict[int, Game] = {}
+        self._stale: Set[int] = set()
+        self.warmed = False
+
+    async def connect(self, app: "Application"):
+        await super().connect(app)
+        if app.role.handles_updates:
+            await self.rebuild()
+
+    async def disconnect(self, app: "Application"):
+        await self.journal.close()
+        await super().disconnect(app)
+
+    async def rebuild(self) -> None:
+        """ Восстанавливаем реестр из таблиц game и score, воркер берет только свои чаты """
+        games = [
+            game for game in await self.app.store.game.list_active_games()
+            if self.app.role.owns_chat(game.chat_id)
+        ]
+        self._games = {game.chat_id: game for game in games}
+        self.warmed = True
+        for game in games:
+            if game.current_question_id is not None and game.question_deadline is not None:
+                self.app.store.game_logic.schedule_question_timeout(game)
+        self.logger.info("restored %s active games", len(self._games))
+
+    def clear(self) -> None:
+        self._games = {}
+        self._stale = set()
+        self.warmed = False
+
+    @property
+    def games(self) -> List[Game]:
+        return list(self._games.values())
+
+    async def get_game(self, chat_id: int) -> Optional[Game]:
+        """
+            Активная игра чата.
+            После восстановления реестра в БД не ходим совсем
+        """
+        if chat_id in self._stale:
+            self._stale.discard(chat_id)
+            return await self.reload_game(chat_id)
+        game = self._games.get(chat_id)
+        if game is not None or self.warmed:
+            return game
+        game = await self.app.store.game.get_game_by_chat_id(chat_id=chat_id)
+        if game is not None:
+            self._games[chat_id] = game
+        return game
+
+    def _mark_stale(self, chat_id: int) -> None:
+        """ Запись игры не дошла до БД, копия в памяти больше не совпадает с базой """
+        self.logger.error("game in chat %s diverged from the database and will be reloaded", chat_id)
+        self._games.pop(chat_id, None)
+        self._stale.add(chat_id)
+
+    async def reload_game(self, chat_id: int) -> Optional[Game]:
+        """
+            Перечитываем игру чата из БД, когда копия в памяти разошлась с базой.
+            Читаем после того, как в БД попадут все накопленные записи, таймер вопроса ставим заново
+        """
+        self._games.pop(chat_id, None)
+        await self.journal.flush()
+        game = await self.app.store.game.get_active_game(chat_id)
+        if game is None:
+            self.app.store.game_logic.timers.cancel(chat_id)
+            return None
+        self._games[chat_id] = game
+        if game.current_question_id is not None and game.question_deadline is not None:
+            self.app.store.game_logic.schedule_question_timeout(game)
+        return game
+
+    async def start_game(self, chat_id: int, users: List[User], theme_id: Optional[int] = None) -> Game:
+        """ Создаем игру после того как в БД попадут все предыдущие записи """
+        game = await self.journal.submit(
+            partial(self.app.store.game.create_game, chat_id=chat_id, users=users, theme_id=theme_id)
+        )
+        self._games[chat_id] = game
+        return game
+
+    def set_current_question(
+            self, game: Game, question_id: int, deadline: Optional[datetime.datetime] = None
+    ) -> None:
+        game.current_question_id = question_id
+        game.question_deadline = deadline
+        self.journal.append(
+            partial(
+                self.app.store.game.set_current_question_for_game,
+                question_id=question_id,
+                game_id=game.id,
+                deadline=deadline,
+                deck_cursor=game.deck_cursor,
+            ),
+            key=game.chat_id,
+        )
+
+    def finish_question(self, game: Game) -> None:
+        """ Добавляем текущий вопрос в пройденные """
+        game.finish_question_ids.append(game.current_question_id)
+        self.journal.append(
+            partial(
+                self.app.store.game.add_finished_question_ids_for_game,
+                new_finished_question_id=game.current_question_id,
+                game_id=game.id,
+            ),
+            key=game.chat_id,
+        )
+
+    def add_points(self, game: Game, user: User, points: int) -> None:
+        game.add_points(user, points)
+        self.journal.append(
+            partial(
+                self.app.store.game.update_score,
+                user_id=user.id,
+                game_id=game.id,
+                count=user.points,
+            ),
+            key=game.chat_id,
+        )
+
+    async def record_correct_answer(
+            self,
+            game: Game,
+            user: User,
+            points: int,
+            question_id: int,
+            next_question_id: Optional[int] = None,
+            deadline: Optional[datetime.datetime] = None,
+    ) -> bool:
+        """
+            Засчитываем верный ответ на вопрос question_id: вопрос пройден, игроку начислены очки,
+            игра переходит к next_question_id. В БД все изменения попадают одним запросом,
+            его результат ждем: если ответ уже засчитан другому, копия игры в памяти устарела,
+            перечитываем игру из БД и возвращаем False
+        """
+        game.finish_question_ids.append(question_id)
+        game.add_points(user, points)
+        if next_question_id is not None:
+            game.current_question_id = next_question_id
+            game.question_deadline = deadline
+        try:
+            score = await self.journal.submit(
+                partial(
+                    self.app.store.game.commit_answer,
+                    game_id=game.id,
+                    question_id=question_id,
+                    user_id=user.id,
+                    points=points,
+                    next_question_id=next_question_id,
+                    deadline=deadline,
+                    deck_cursor=game.deck_cursor,
+                )
+            )
+        except Exception as e:
+            self.logger.error("Exception", exc_info=e)
+            score = None
+        if score is not None:
+            return True
+
+        self.logger.warning("answer to question %s in game %s was not committed", question_id, game.id)
+        await self.reload_game(game.chat_id)
+        return False
+
+    def finish_game(self, game: Game, winner_user_id: Optional[int] = None) -> None:
+        """ Завершаем игру и убираем ее из реестра """
+        self._games.pop(game.chat_id, None)
+        game.status = StatusGame.FINISHED
+        game.question_deadline = None
+        self.journal.append(
+            partial(
+                self.app.store.game.set_status_for_game,
+                status=StatusGame.FINISHED,
+                game=game,
+                winner_user_id=winner_user_id,
+            ),
+            key=game.chat_id,
+        )
@@ -0,0 +1,86 @@
+import asyncio
+from asyncio import Future, Queue, Task
+from logging import Logger
+from typing import Any, Awaitable, Callable, Hashable, Optional, Tuple
+
+Write = Callable[[], Awaitable[Any]]
+OnFailure = Callable[[Hashable], None]
+
+
+class WriteBehindJournal:
+    """
+        Журнал отложенной записи в БД.
+        Записи применяются фоновой задачей строго в порядке добавления,
+        вызывающий код не ждет базу, если ему не нужен результат.
+        Если запись так и не удалась, по ее ключу вызывается on_failure,
+        чтобы владелец данных перечитал их из БД
+    """
+    RETRIES = 3
+    RETRY_DELAY = 0.5  # секунд, удваивается с каждой попыткой
+
+    def __init__(self, logger: Logger, on_failure: Optional[OnFailure] = None):
+        self.logger = logger
+        self.on_failure = on_failure
+        self.failed_total = 0
+        self._queue: Optional[Queue] = None
+        self._task: Optional[Task] = None
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    def append(self, write: Write, key: Optional[Hashable] = None) -> None:
+        """ Ставим запись в журнал и не ждем ее применения """
+        self._put(write, None, key)
+
+    def submit(self, write: Write, key: Optional[Hashable] = None) -> Future:
+        """ Ставим запись в журнал, future завершится после ее применения """
+        future = asyncio.get_running_loop().create_future()
+        self._put(write, future, key)
+        return future
+
+    async def flush(self) -> None:
+        """ Ждем, пока все накопленные записи попадут в БД """
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def close(self) -> None:
+        await self.flush()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _put(self, write: Write, future: Optional[Future], key: Optional[Hashable]) -> None:
+        if self._task is None or self._task.done():
+            self._queue = self._queue or Queue()
+            self._task = asyncio.create_task(self._run())
+        self._queue.put_nowait((write, future, key))
+
+    async def _run(self) -> None:
+        while True:
+            entry: Tuple[Write, Optional[Future], Optional[Hashable]] = await self._queue.get()
+            try:
+                await self._apply(*entry)
+            finally:
+                self._queue.task_done()
+
+    async def _apply(self, write: Write, future: Optional[Future], key: Optional[Hashable]) -> None:
+        delay = self.RETRY_DELAY
+        for attempt in range(1, self.RETRIES + 1):
+            try:
+                result = await write()
+            except Exception as e:
+                if attempt == self.RETRIES:
+                    self.failed_total += 1
+                    self.logger.error("journal write for %s failed", key, exc_info=e)
+                    if future is not None and not future.done():
+                        future.set_exception(e)
+                    if key is not None and self.on_failure is not None:
+                        self.on_failure(key)
+                    return
+                await asyncio.sleep(delay)
+                delay *= 2
+            else:
+                if future is not None and not future.done():
+                    future.set_result(result)
+                return
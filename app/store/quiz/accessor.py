@@ -1,7 +1,12 @@
+import asyncio
 import datetime
-from typing import List
+import random
+import typing
+from typing import List, Set, Tuple
 from typing import Optional
 
+from sqlalchemy.dialects.postgresql import insert
+
 from app.base.base_accessor import BaseAccessor
 from app.quiz.models import (
     Theme,
@@ -10,13 +15,53 @@ from app.quiz.models import (
     ThemeModel,
     QuestionModel,
     AnswerModel, User, UserModel, GameModel, StatusGame, Game, Score, ScoreModel, UserScore, Winner,
+    GameStats, GameStatsDailyModel, WinnerStatsModel, FinishedGame,
 )
 from app.store.database.gino import db
+from app.store.quiz.catalog import QuestionCatalog
+from app.web.cache import TTLCache
+
+if typing.TYPE_CHECKING:
+    from app.web.app import Application
 
 
 class QuizAccessor(BaseAccessor):
+    def __init__(self, app: "Application", *args, **kwargs):
+        super().__init__(app, *args, **kwargs)
+        self.catalog = QuestionCatalog()
+
+    async def connect(self, app: "Application"):
+        await super().connect(app)
+        await self.load_catalog()
+
+    async def load_catalog(self) -> QuestionCatalog:
+        """ Загружаем весь каталог вопросов из БД """
+        self.catalog.load(await self.list_questions())
+        return self.catalog
+
+    async def get_catalog(self) -> QuestionCatalog:
+        """ Каталог вопросов, при первом обращении загружается из БД """
+        if not self.catalog.loaded:
+            await self.load_catalog()
+        return self.catalog
+
+    async def sync_catalog(self) -> QuestionCatalog:
+        """
+            Каталог, сверенный с БД.
+            Нужен процессам, в которые вопросы добавляет другой процесс:
+            сравниваем число вопросов и последний id и перечитываем каталог при расхождении
+        """
+        res = await db.select([db.func.count(QuestionModel.id), db.func.max(QuestionModel.id)]).gino.first()
+        questions = self.catalog.questions
+        last_id = questions[-1].id if questions else None
+        if not self.catalog.loaded or res[0] != len(questions) or res[1] != last_id:
+            await self.load_catalog()
+        return self.catalog
+
     async def create_theme(self, title: str) -> Theme:
         res = await ThemeModel.create(title=title)
+        self.catalog.add_theme(res.id)
+        self.invalidate_cache("themes")
         return Theme(id=res.id, title=res.title)
 
     async def get_theme_by_title(self, title: str) -> Optional[Theme]:
@@ -35,18 +80,48 @@ class QuizAccessor(BaseAccessor):
         return themes
 
     async def create_answers(self, question_id, answers: List[Answer]) -> List[Answer]:
-        result = []
-        for answer in answers:
-            res = await AnswerModel.create(title=answer.title, is_correct=answer.is_correct, question_id=question_id)
-            result.append(Answer(title=res.title, is_correct=res.is_correct))
-        return result
+        if not answers:
+            return []
+        rows = await AnswerModel.insert().values([
+            dict(title=answer.title, is_correct=answer.is_correct, question_id=question_id) for answer in answers
+        ]).returning(AnswerModel.title, AnswerModel.is_correct).gino.all()
+        return [Answer(title=el.title, is_correct=el.is_correct) for el in rows]
 
     async def create_question(
             self, title: str, theme_id: int, answers: List[Answer]
     ) -> Question:
         res = await QuestionModel.create(title=title, theme_id=theme_id)
         el_answers = await self.create_answers(res.id, answers)
-        return Question(id=res.id, title=res.title, theme_id=res.theme_id, answers=el_answers)
+        question = Question(id=res.id, title=res.title, theme_id=res.theme_id, answers=el_answers)
+        if self.catalog.loaded:
+            self.catalog.add(question)
+        self.invalidate_cache("questions")
+        return question
+
+    async def create_questions(self, questions: List[Question]) -> List[Question]:
+        """
+            Создаем пачку вопросов двумя многострочными INSERT: вопросы и все их ответы.
+            Каталог и кэш ответов не обновляются, это делает вызывающий код после коммита
+        """
+        if not questions:
+            return []
+        rows = await QuestionModel.insert().values([
+            dict(title=el.title, theme_id=el.theme_id) for el in questions
+        ]).returning(QuestionModel.id, QuestionModel.title).gino.all()
+        ids = {el.title: el.id for el in rows}
+        await AnswerModel.insert().values([
+            dict(title=answer.title, is_correct=answer.is_correct, question_id=ids[question.title])
+            for question in questions for answer in question.answers
+        ]).gino.status()
+        return [
+            Question(id=ids[el.title], title=el.title, theme_id=el.theme_id, answers=el.answers)
+            for el in questions
+        ]
+
+    async def list_existing_titles(self, titles: List[str]) -> Set[str]:
+        """ Какие из заголовков уже заняты вопросами в БД """
+        rows = await db.select([QuestionModel.title]).where(QuestionModel.title.in_(titles)).gino.all()
+        return {el.title for el in rows}
 
     async def get_question_by_title(self, title: str) -> Optional[Question]:
         res = await QuestionModel.query.where(QuestionModel.title == title).gino.first()
@@ -82,53 +157,96 @@ class QuizAccessor(BaseAccessor):
                 answers=[Answer(title=el.title, is_correct=el.is_correct) for el in el.answers])
             for el in questions]
 
+    async def page_questions(
+            self,
+            after_id: Optional[int] = None,
+            limit: int = 50,
+            theme_id: Optional[int] = None,
+            title_prefix: Optional[str] = None,
+            with_answers: bool = False,
+    ) -> List[Question]:
+        """
+            Страница вопросов по возрастанию id (keyset пагинация по questions.id)
+            Ответы подгружаются отдельным запросом только по запросу
+        """
+        query = QuestionModel.query
+        if after_id is not None:
+            query = query.where(QuestionModel.id > after_id)
+        if theme_id is not None:
+            query = query.where(QuestionModel.theme_id == theme_id)
+        if title_prefix:
+            query = query.where(QuestionModel.title.startswith(title_prefix, autoescape=True))
+        questions = await query.order_by(QuestionModel.id).limit(limit).gino.all()
+
+        answers = {el.id: [] for el in questions}
+        if with_answers and questions:
+            answer_models = await AnswerModel.query.where(
+                AnswerModel.question_id.in_(list(answers))
+            ).order_by(AnswerModel.id).gino.all()
+            for el in answer_models:
+                answers[el.question_id].append(Answer(title=el.title, is_correct=el.is_correct))
+        return [
+            Question(id=el.id, title=el.title, theme_id=el.theme_id, answers=answers[el.id])
+            for el in questions
+        ]
+
 
 class GameAccessor(BaseAccessor):
+    STATS_CACHE_TTL = 10  # секунд
+    DECK_SIZE = 50  # вопросов в игре
+    RECENT_GAMES = 3  # сколько прошлых игр чата учитываем, чтобы не повторять вопросы
+
+    def __init__(self, app: "Application", *args, **kwargs):
+        super().__init__(app, *args, **kwargs)
+        self.stats_cache = TTLCache(ttl=self.STATS_CACHE_TTL)
+
     async def get_game_by_chat_id(self, chat_id: str, _all: bool = False) -> Optional[Game]:
         """
             Получаем игру из БД по chat_id
             по умолчанию вытаскиваем только не завершенные игры
         """
+        if not _all:
+            return await self.get_active_game(chat_id)
+
         query = GameModel.outerjoin(ScoreModel).outerjoin(UserModel).select()
-        if _all:
-            res_query = await query.where(GameModel.chat_id == chat_id).gino.load(
-                GameModel.distinct(GameModel.id).load(add_user=UserModel.distinct(UserModel.id)).load(
-                    add_score=ScoreModel.distinct(ScoreModel.id))).all()
-        else:
-            res_query = await query.where(GameModel.chat_id == chat_id).where(
-                GameModel.status != StatusGame.FINISHED).gino.load(
-                GameModel.distinct(GameModel.id).load(add_user=UserModel.distinct(UserModel.id)).load(
-                    add_score=ScoreModel.distinct(ScoreModel.id))).all()
+        res_query = await query.where(GameModel.chat_id == chat_id).gino.load(
+            GameModel.distinct(GameModel.id).load(add_user=UserModel.distinct(UserModel.id)).load(
+                add_score=ScoreModel.distinct(ScoreModel.id))).all()
 
         if not res_query:
             return None
 
-        res = res_query[0]
-        questions = await self.app.store.quizzes.list_questions()
-        scores = {el.user_id: el.count for el in res.scores}
-        if res:
-            return Game(id=res.id,
-                        chat_id=res.chat_id,
-                        status=res.status,
-                        users=[User(
-                            id=el.id,
-                            vk_id=el.vk_id,
-                            first_name=el.first_name,
-                            last_name=el.last_name,
-                            points=scores.get(el.id, 0),
-                        ) for el in sorted(res.users, key=lambda x: x.id)],
-                        questions=[
-                            Question(
-                                id=el.id,
-                                title=el.title,
-                                theme_id=el.theme_id,
-                                answers=[Answer(title=el.title, is_correct=el.is_correct) for el in el.answers])
-                            for el in questions],
-                        current_question_id=res.current_question_id,
-                        finish_question_ids=res.question_ids if res.question_ids else [],
-                        started_at=res.started_at,
-                        finished_at=res.finished_at,
-            )
+        catalog = await self.app.store.quizzes.get_catalog()
+        return self._to_game(res_query[0], catalog)
+
+    async def get_active_game(self, chat_id: int) -> Optional[Game]:
+        """
+            Незавершенная игра чата.
+            Строку игры находим по частичному уникальному индексу,
+            игроков со счетом берем вторым запросом по score.game_id без общего outer join
+        """
+        res = await GameModel.query.where(GameModel.chat_id == chat_id).where(
+            GameModel.status != StatusGame.FINISHED).gino.first()
+        if res is None:
+            return None
+
+        rows = await ScoreModel.join(UserModel).select().where(
+            ScoreModel.game_id == res.id).gino.load((ScoreModel, UserModel)).all()
+        for score, user in rows:
+            res.add_score = score
+            res.add_user = user
+
+        catalog = await self.app.store.quizzes.get_catalog()
+        return self._to_game(res, catalog)
+
+    async def list_active_games(self) -> List[Game]:
+        """ Получаем все незавершенные игры, нужно для восстановления состояния при старте """
+        query = GameModel.outerjoin(ScoreModel).outerjoin(UserModel).select()
+        res_query = await query.where(GameModel.status != StatusGame.FINISHED).order_by(GameModel.id).gino.load(
+            GameModel.distinct(GameModel.id).load(add_user=UserModel.distinct(UserModel.id)).load(
+                add_score=ScoreModel.distinct(ScoreModel.id))).all()
+        catalog = await self.app.store.quizzes.get_catalog()
+        return [self._to_game(res, catalog) for res in res_query]
 
     async def list_finish_games(self, status: str = StatusGame.FINISHED, limit: int = None, offset: int = None) -> List[Game]:
         """ Получаем список игр """
@@ -139,42 +257,61 @@ class GameAccessor(BaseAccessor):
             GameModel.distinct(GameModel.id).load(
                 add_user=UserModel.distinct(UserModel.id)).load(
                 add_score=ScoreModel.distinct(ScoreModel.id))).all()
-        games = []
-        for res in res_query:
-            questions = await self.app.store.quizzes.list_questions()
-            scores = {el.user_id: el.count for el in res.scores}
-            if res:
-                games.append(
-                    Game(
-                        id=res.id,
-                        chat_id=res.chat_id,
-                        status=res.status,
-                        users=[User(
-                            id=el.id,
-                            vk_id=el.vk_id,
-                            first_name=el.first_name,
-                            last_name=el.last_name,
-                            points=scores.get(el.id, 0),
-                        ) for el in res.users],
-                        questions=[
-                            Question(
-                                id=el.id,
-                                title=el.title,
-                                theme_id=el.theme_id,
-                                answers=[Answer(title=el.title, is_correct=el.is_correct) for el in
-                                         el.answers])
-                            for el in questions],
-                        current_question_id=res.current_question_id,
-                        finish_question_ids=res.question_ids if res.question_ids else [],
-                        started_at=res.started_at,
-                        finished_at=res.finished_at,
-                    )
-                )
-        return games
+        catalog = await self.app.store.quizzes.get_catalog()
+        return [self._to_game(res, catalog) for res in res_query]
+
+    async def page_finished_games(
+            self, limit: int, after_id: Optional[int] = None, offset: Optional[int] = None
+    ) -> Tuple[int, List[FinishedGame]]:
+        """
+            Страница завершенных игр с победителем для админки одним запросом.
+            Страница выбирается по курсору WHERE id > after_id ORDER BY id LIMIT,
+            общее число игр считает скалярный подзапрос в том же запросе,
+            он не связан со страницей, и Postgres выполняет его один раз
+        """
+        total_games = db.select([db.func.count()]).select_from(GameModel).where(
+            GameModel.status == StatusGame.FINISHED).correlate(None).as_scalar()
+        query = db.select([
+            GameModel.id,
+            GameModel.chat_id,
+            GameModel.started_at,
+            GameModel.finished_at,
+            UserModel.vk_id.label("winner_vk_id"),
+            ScoreModel.count.label("winner_points"),
+            total_games.label("total"),
+        ]).select_from(
+            GameModel.outerjoin(UserModel, UserModel.id == GameModel.winner_user_id).outerjoin(
+                ScoreModel, db.and_(ScoreModel.game_id == GameModel.id, ScoreModel.user_id == GameModel.winner_user_id))
+        ).where(GameModel.status == StatusGame.FINISHED).order_by(GameModel.id)
+        if after_id is not None:
+            query = query.where(GameModel.id > after_id)
+        rows = await query.limit(limit).offset(offset).gino.all()
 
-    async def create_game(self, chat_id: str, users: list) -> Game:
-        """ Создаем игру """
-        res_game = await GameModel.create(chat_id=chat_id, status=StatusGame.STARTED)
+        if rows:
+            total = rows[0]["total"]
+        elif after_id is not None or offset:
+            # страница за концом списка, общее число считаем отдельно
+            total = await self.count_games(status=StatusGame.FINISHED)
+        else:
+            total = 0
+        return total, [
+            FinishedGame(
+                id=el["id"],
+                chat_id=el["chat_id"],
+                started_at=el["started_at"],
+                finished_at=el["finished_at"],
+                winner_vk_id=el["winner_vk_id"],
+                winner_points=el["winner_points"],
+            ) for el in rows
+        ]
+
+    async def create_game(self, chat_id: str, users: list, theme_id: Optional[int] = None) -> Game:
+        """ Создаем игру с перемешанной колодой вопросов """
+        catalog = await self.app.store.quizzes.get_catalog()
+        deck = await self._build_deck(chat_id=chat_id, catalog=catalog, theme_id=theme_id)
+        res_game = await GameModel.create(
+            chat_id=chat_id, status=StatusGame.STARTED, question_deck=deck, deck_cursor=0, theme_id=theme_id,
+        )
         if users:
             await ScoreModel.insert().gino.all([dict(game_id=res_game.id, user_id=user.id, count=0) for user in users])
         return Game(
@@ -184,52 +321,188 @@ class GameAccessor(BaseAccessor):
             users=users,
             finish_question_ids=[],
             current_question_id=res_game.current_question_id,
-            questions=await self.app.store.quizzes.list_questions(),
+            questions=catalog.index,
             started_at=res_game.started_at,
             finished_at=res_game.finished_at,
+            deck=deck,
+            theme_id=theme_id,
+        )
+
+    async def _build_deck(self, chat_id: int, catalog: QuestionCatalog, theme_id: Optional[int] = None) -> List[int]:
+        """
+            Колода игры: DECK_SIZE случайных вопросов каталога или темы.
+            Вопросы последних RECENT_GAMES игр чата попадают в колоду,
+            только если свежих вопросов не хватило
+        """
+        questions = catalog.by_theme(theme_id) if theme_id is not None else catalog.questions
+        recent = await self._recent_question_ids(chat_id)
+        fresh = [el.id for el in questions if el.id not in recent]
+        deck = random.sample(fresh, min(self.DECK_SIZE, len(fresh)))
+        if len(deck) < self.DECK_SIZE:
+            seen = [el.id for el in questions if el.id in recent]
+            deck += random.sample(seen, min(self.DECK_SIZE - len(deck), len(seen)))
+        return deck
+
+    async def _recent_question_ids(self, chat_id: int) -> Set[int]:
+        """ Вопросы, которые уже задавались в последних играх чата """
+        rows = await db.select([GameModel.question_deck, GameModel.deck_cursor]).where(
+            GameModel.chat_id == chat_id).order_by(GameModel.id.desc()).limit(self.RECENT_GAMES).gino.all()
+        return {question_id for el in rows for question_id in (el.question_deck or [])[:el.deck_cursor]}
+
+    @staticmethod
+    def _to_game(res: GameModel, catalog: QuestionCatalog) -> Game:
+        scores = {el.user_id: el.count for el in res.scores}
+        finish_question_ids = res.question_ids if res.question_ids else []
+        deck, deck_cursor = res.question_deck, res.deck_cursor
+        if deck is None:
+            # игра начата до появления колод, доигрываем оставшиеся вопросы по порядку каталога
+            finished = set(finish_question_ids)
+            deck = [el.id for el in catalog.questions if el.id not in finished and el.id != res.current_question_id]
+            deck_cursor = 0
+        return Game(
+            id=res.id,
+            chat_id=res.chat_id,
+            status=res.status,
+            users=[User(
+                id=el.id,
+                vk_id=el.vk_id,
+                first_name=el.first_name,
+                last_name=el.last_name,
+                points=scores.get(el.id, 0),
+            ) for el in sorted(res.users, key=lambda x: x.id)],
+            questions=catalog.index,
+            current_question_id=res.current_question_id,
+            finish_question_ids=finish_question_ids,
+            started_at=res.started_at,
+            finished_at=res.finished_at,
+            question_deadline=res.question_deadline,
+            deck=deck,
+            deck_cursor=deck_cursor,
+            theme_id=res.theme_id,
         )
 
-    async def set_current_question_for_game(self, question_id: int, game_id: int) -> None:
-        """ Обновляем текущий вопрос для игры """
-        await GameModel.update.values(current_question_id=question_id).where(GameModel.id == game_id).gino.status()
+    async def set_current_question_for_game(
+            self,
+            question_id: int,
+            game_id: int,
+            deadline: Optional[datetime.datetime] = None,
+            deck_cursor: Optional[int] = None,
+    ) -> None:
+        """ Обновляем текущий вопрос для игры, время, до которого на него можно ответить, и позицию в колоде """
+        values = dict(current_question_id=question_id, question_deadline=deadline)
+        if deck_cursor is not None:
+            values["deck_cursor"] = deck_cursor
+        await GameModel.update.values(**values).where(GameModel.id == game_id).gino.status()
 
     async def set_status_for_game(self, status: int, game: Game, winner_user_id: int = None) -> Game:
         """ Обновляем статус игры """
         if status == StatusGame.FINISHED:
             finished_at = datetime.datetime.utcnow()
             game.finished_at = finished_at
-            await GameModel.update.values(status=status,
-                                          finished_at=finished_at,
-                                          winner_user_id=winner_user_id).where(GameModel.id == game.id).gino.status()
+            async with db.transaction():
+                # условие на статус не дает посчитать одну игру в статистике дважды
+                res = await GameModel.update.values(
+                    status=status,
+                    finished_at=finished_at,
+                    question_deadline=None,
+                    winner_user_id=winner_user_id,
+                ).where(GameModel.id == game.id).where(GameModel.status != StatusGame.FINISHED).returning(
+                    GameModel.started_at, GameModel.finished_at).gino.first()
+                if res is not None:
+                    await self._rollup_finished_game(
+                        started_at=res.started_at,
+                        finished_at=res.finished_at,
+                        winner_user_id=winner_user_id,
+                    )
+            # сбрасываем после коммита, иначе параллельный запрос закэширует старые данные
+            self.stats_cache.clear()
+            self.invalidate_cache("games")
         else:
             await GameModel.update.values(status=status).where(GameModel.id == game.id).gino.status()
         game.status = status
         return game
 
-    async def add_finished_question_ids_for_game(self,
-                                                 current_question_ids: list,
-                                                 new_finished_question_id: int,
-                                                 game_id: int) -> None:
-        """ Обновляем массив пройденных вопросов в игре """
-        current_question_ids.append(new_finished_question_id)
-        await GameModel.update.values(question_ids=current_question_ids).where(GameModel.id == game_id).gino.status()
+    async def _rollup_finished_game(
+            self, started_at: datetime.datetime, finished_at: datetime.datetime, winner_user_id: Optional[int]
+    ) -> None:
+        """ Добавляем завершенную игру в накопительную статистику """
+        stmt = insert(GameStatsDailyModel).values(
+            day=started_at.date(),
+            games_count=1,
+            duration_total=finished_at - started_at,
+        )
+        await stmt.on_conflict_do_update(
+            index_elements=[GameStatsDailyModel.day],
+            set_=dict(
+                games_count=GameStatsDailyModel.games_count + 1,
+                duration_total=GameStatsDailyModel.duration_total + stmt.excluded.duration_total,
+            )
+        ).gino.status()
+        if winner_user_id is not None:
+            stmt = insert(WinnerStatsModel).values(user_id=winner_user_id, win_count=1)
+            await stmt.on_conflict_do_update(
+                index_elements=[WinnerStatsModel.user_id],
+                set_=dict(win_count=WinnerStatsModel.win_count + 1),
+            ).gino.status()
+
+    async def add_finished_question_ids_for_game(self, new_finished_question_id: int, game_id: int) -> None:
+        """ Добавляем вопрос в массив пройденных вопросов игры, если его там еще нет """
+        await GameModel.update.values(
+            question_ids=db.func.array_append(GameModel.question_ids, new_finished_question_id)
+        ).where(GameModel.id == game_id).where(
+            self._not_finished(new_finished_question_id)).gino.status()
+
+    @staticmethod
+    def _not_finished(question_id: int):
+        """ Условие: вопроса нет в пройденных вопросах игры """
+        return db.or_(GameModel.question_ids.is_(None), db.not_(GameModel.question_ids.any(question_id)))
 
     async def update_score(self, user_id: int, game_id: int, count: int):
         """ Записываем игроку очки за верный ответ """
         await ScoreModel.update.values(count=count). \
             where(ScoreModel.user_id == user_id).where(ScoreModel.game_id == game_id).gino.status()
 
+    async def commit_answer(
+            self,
+            game_id: int,
+            question_id: int,
+            user_id: int,
+            points: int,
+            next_question_id: Optional[int] = None,
+            deadline: Optional[datetime.datetime] = None,
+            deck_cursor: Optional[int] = None,
+    ) -> Optional[int]:
+        """
+            Засчитываем верный ответ одним запросом:
+            если текущий вопрос игры все еще question_id и он еще не пройден,
+            добавляем его в пройденные, переходим к next_question_id и начисляем игроку очки.
+            Возвращаем новый счет игрока или None, если вопрос уже засчитан другому
+        """
+        values = dict(question_ids=db.func.array_append(GameModel.question_ids, question_id))
+        if next_question_id is not None:
+            values.update(current_question_id=next_question_id, question_deadline=deadline)
+            if deck_cursor is not None:
+                values["deck_cursor"] = deck_cursor
+        # на последнем вопросе current_question_id не меняется, повтор отсекает проверка пройденных
+        advanced = GameModel.update.values(**values).where(GameModel.id == game_id).where(
+            GameModel.current_question_id == question_id).where(self._not_finished(question_id)).where(
+            GameModel.status != StatusGame.FINISHED).returning(GameModel.id).cte("advanced")
+        return await ScoreModel.update.values(count=ScoreModel.count + points).where(
+            ScoreModel.game_id == advanced.c.id).where(ScoreModel.user_id == user_id).returning(
+            ScoreModel.count).gino.scalar()
+
     async def create_level_game(self, game: Game, user: User):
         """
             Записываем импровизированный уровень игры
             в объект game добавляем пройденные вопросы
             и создаем объект Score c информацией по игроку
          """
-        await self.add_finished_question_ids_for_game(
-            game_id=game.id,
-            current_question_ids=game.finish_question_ids,
-            new_finished_question_id=game.current_question_id)
-        await self.update_score(user_id=user.id, game_id=game.id, count=user.points)
+        game.finish_question_ids.append(game.current_question_id)
+        async with db.transaction():
+            await self.add_finished_question_ids_for_game(
+                game_id=game.id,
+                new_finished_question_id=game.current_question_id)
+            await self.update_score(user_id=user.id, game_id=game.id, count=user.points)
 
     async def get_count_score_by_game_and_user_id(self, game_id: int, user_id: int) -> Optional[int]:
         """ Получаем общее количество очков юзера (user_id) из игры (game_id)"""
@@ -250,6 +523,60 @@ class GameAccessor(BaseAccessor):
             points=sum([x.count for x in el.scores])
         ) for el in query_res]
 
+    async def get_stats(self, limit: int = None, offset: int = None) -> GameStats:
+        """
+            Статистика игр по накопительным таблицам.
+            Итоги и страница победителей независимы, поэтому запрашиваются параллельно
+            на разных соединениях пула и кэшируются до завершения следующей игры
+        """
+        winners_key = ("winners", limit, offset)
+        summary = self.stats_cache.get("summary")
+        winners_top = self.stats_cache.get(winners_key)
+        # в кэш кладем только то, что прочитали из БД, иначе каждое чтение продлевало бы ttl
+        if summary is None and winners_top is None:
+            summary, winners_top = await asyncio.gather(
+                self._stats_summary(), self._list_top_winners(limit=limit, offset=offset)
+            )
+            self.stats_cache.set("summary", summary)
+            self.stats_cache.set(winners_key, winners_top)
+        elif summary is None:
+            summary = await self._stats_summary()
+            self.stats_cache.set("summary", summary)
+        elif winners_top is None:
+            winners_top = await self._list_top_winners(limit=limit, offset=offset)
+            self.stats_cache.set(winners_key, winners_top)
+
+        games_total, duration_total, days = summary
+        return GameStats(
+            games_total=games_total,
+            duration_total=duration_total,
+            duration_average=duration_total / games_total if duration_total is not None else None,
+            games_average_per_day=games_total / days if days else 0,
+            winners_top=winners_top,
+        )
+
+    async def _stats_summary(self) -> Tuple[int, Optional[datetime.timedelta], int]:
+        daily = GameStatsDailyModel
+        async with db.acquire(reuse=False):
+            res = await db.select([
+                db.func.coalesce(db.func.sum(daily.games_count), 0),
+                db.func.sum(daily.duration_total),
+                db.func.count(daily.day),
+            ]).gino.first()
+        return res[0], res[1], res[2]
+
+    async def _list_top_winners(self, limit: int = None, offset: int = None) -> List[Winner]:
+        async with db.acquire(reuse=False):
+            res = await db.select([
+                UserModel.vk_id, UserModel.first_name, UserModel.last_name, WinnerStatsModel.win_count,
+            ]).select_from(
+                WinnerStatsModel.join(UserModel, WinnerStatsModel.user_id == UserModel.id)
+            ).order_by(WinnerStatsModel.win_count.desc(), UserModel.vk_id).limit(limit).offset(offset).gino.all()
+        return [
+            Winner(vk_id=el.vk_id, win_count=el.win_count, first_name=el.first_name, last_name=el.last_name)
+            for el in res
+        ]
+
     async def count_games(self, status: str = None) -> int:
         """ Получаем кол-во игр """
         select = db.func.count(GameModel.id)
@@ -0,0 +1,73 @@
+from typing import Dict, Iterable, List, Optional
+
+from app.quiz.models import Question
+
+
+class QuestionCatalog:
+    """
+        Процессный кэш вопросов.
+        Загружается один раз при старте и обновляется при записи
+        новых вопросов и тем, каждое изменение увеличивает version
+    """
+
+    def __init__(self):
+        self.version = 0
+        self.loaded = False
+        self._questions: Dict[int, Question] = {}
+        self._by_theme: Dict[int, List[Question]] = {}
+        self._list: Optional[List[Question]] = None
+
+    def __len__(self) -> int:
+        return len(self._questions)
+
+    def __contains__(self, question_id: int) -> bool:
+        return question_id in self._questions
+
+    @property
+    def index(self) -> Dict[int, Question]:
+        """ Вопросы по id, словарь заменяется целиком при перезагрузке каталога """
+        return self._questions
+
+    @property
+    def questions(self) -> List[Question]:
+        """ Список вопросов текущей версии каталога, общий для всех игр """
+        if self._list is None:
+            self._list = list(self._questions.values())
+        return self._list
+
+    def load(self, questions: Iterable[Question]) -> None:
+        """ Полностью перезаполняем каталог """
+        self._questions = {}
+        self._by_theme = {}
+        for question in sorted(questions, key=lambda x: x.id):
+            self._put(question)
+        self.loaded = True
+        self._changed()
+
+    def add(self, question: Question) -> None:
+        self._put(question)
+        self._changed()
+
+    def add_theme(self, theme_id: int) -> None:
+        self._by_theme.setdefault(theme_id, [])
+        self._changed()
+
+    def get(self, question_id: int) -> Optional[Question]:
+        return self._questions.get(question_id)
+
+    def by_theme(self, theme_id: int) -> List[Question]:
+        return self._by_theme.get(theme_id, [])
+
+    def clear(self) -> None:
+        self._questions = {}
+        self._by_theme = {}
+        self.loaded = False
+        self._changed()
+
+    def _put(self, question: Question) -> None:
+        self._questions[question.id] = question
+        self._by_theme.setdefault(question.theme_id, []).append(question)
+
+    def _changed(self) -> None:
+        self._list = None
+        self.version += 1
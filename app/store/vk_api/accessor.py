@@ -1,20 +1,30 @@
 import json
 import random
 import typing
-from typing import Optional, List
+from asyncio import Future
+from typing import Optional, List, Union
+from urllib.parse import urlencode
 
 from aiohttp import TCPConnector
 from aiohttp.client import ClientSession
 
 from app.base.base_accessor import BaseAccessor
+from app.cluster.roles import Role
+from app.cluster.transport import UpdateRouter, UpdateServer, socket_path
 from app.quiz.models import User
 from app.store.vk_api.dataclasses import Update, Message, UpdateObject, UpdateStatus
+from app.store.vk_api.dispatcher import MessageDispatcher, build_execute_code
 from app.store.vk_api.poller import Poller
+from app.store.vk_api.worker_pool import ChatWorkerPool
+from app.web.cache import LRUCache
+from app.web.config import BotMode
+from app.web.utils import dumps
 
 if typing.TYPE_CHECKING:
     from app.web.app import Application
 
-API_PATH = "https://api.vk.com/method/"
+API_VERSION = "5.131"
+RECENT_EVENTS_SIZE = 10000
 
 
 class BotIsNotAdminError(Exception):
@@ -23,7 +33,8 @@ class BotIsNotAdminError(Exception):
 
 
 class Keyboard:
-    navigate = {
+    """ Клавиатуры кодируются в JSON один раз при импорте """
+    navigate = dumps({
         "inline": True,
         "buttons": [
             [
@@ -53,7 +64,7 @@ class Keyboard:
                 },
             ]
         ]
-    }
+    })
 
 
 class VkApiAccessor(BaseAccessor):
@@ -63,36 +74,84 @@ class VkApiAccessor(BaseAccessor):
         self.key: Optional[str] = None
         self.server: Optional[str] = None
         self.poller: Optional[Poller] = None
+        self.pool: Optional[ChatWorkerPool] = None
+        self.sink: Optional[Union[ChatWorkerPool, UpdateRouter]] = None
+        self.update_server: Optional[UpdateServer] = None
+        self.dispatcher: Optional[MessageDispatcher] = None
         self.ts: Optional[int] = None
+        # VK повторяет событие Callback API, если не получил ok вовремя, повторы отбрасываем по event_id
+        self.recent_events = LRUCache(maxsize=RECENT_EVENTS_SIZE)
 
     async def connect(self, app: "Application"):
+        role = app.role
+        if not (role.receives_updates or role.handles_updates):
+            return
         self.session = ClientSession(connector=TCPConnector(verify_ssl=False))
-        try:
-            await self._get_long_poll_service()
-        except Exception as e:
-            self.logger.error("Exception", exc_info=e)
-        self.poller = Poller(app.store)
-        self.logger.info("start polling")
-        await self.poller.start()
+        if role.handles_updates:
+            # лимит запросов группы делится между воркерами
+            self.dispatcher = MessageDispatcher(
+                self,
+                rate=app.config.bot.requests_per_second / role.workers,
+                retries=app.config.bot.send_retries,
+            )
+            self.dispatcher.start()
+            self.pool = ChatWorkerPool(
+                handler=app.store.bots_manager.handle_update,
+                workers=app.config.bot.workers,
+                max_pending=app.config.bot.max_pending_updates,
+                max_chat_pending=app.config.bot.max_chat_pending_updates,
+            )
+        if role.name == Role.WORKER:
+            self.pool.start()
+            self.update_server = UpdateServer(
+                path=socket_path(app.config.cluster.socket_dir, role.index), pool=self.pool,
+            )
+            await self.update_server.start()
+            self.logger.info("worker %s is waiting for updates", role.index)
+        if role.receives_updates:
+            if self.pool is not None:
+                self.sink = self.pool
+            else:
+                self.sink = UpdateRouter(
+                    [socket_path(app.config.cluster.socket_dir, index) for index in range(role.workers)],
+                    max_pending=app.config.bot.max_pending_updates,
+                )
+            if app.config.bot.mode == BotMode.CALLBACK:
+                # события приходят на /vk.callback и сразу попадают в sink
+                self.sink.start()
+                self.logger.info("waiting for callback events")
+            else:
+                try:
+                    await self._get_long_poll_service()
+                except Exception as e:
+                    self.logger.error("Exception", exc_info=e)
+                self.poller = Poller(app.store, sink=self.sink)
+                self.logger.info("start polling")
+                await self.poller.start()
 
     async def disconnect(self, app: "Application"):
-        if self.session:
-            await self.session.close()
         if self.poller:
             await self.poller.stop()
+        elif self.sink:
+            await self.sink.stop()
+        if self.update_server:
+            await self.update_server.stop()
+            await self.pool.stop()
+        if self.dispatcher:
+            await self.dispatcher.stop()
+        if self.session:
+            await self.session.close()
 
     @staticmethod
     def _build_query(host: str, method: str, params: dict) -> str:
-        url = host + method + "?"
         if "v" not in params:
-            params["v"] = "5.131"
-        url += "&".join([f"{k}={v}" for k, v in params.items()])
-        return url
+            params["v"] = API_VERSION
+        return host + method + "?" + urlencode(params)
 
-    async def _get_long_poll_service(self):
+    async def _get_long_poll_service(self, refresh_ts: bool = True):
         async with self.session.get(
                 self._build_query(
-                    host=API_PATH,
+                    host=self.app.config.bot.api_url,
                     method="groups.getLongPollServer",
                     params={
                         "group_id": self.app.config.bot.group_id,
@@ -104,13 +163,14 @@ class VkApiAccessor(BaseAccessor):
             self.logger.info(data)
             self.key = data["key"]
             self.server = data["server"]
-            self.ts = data["ts"]
+            if refresh_ts or self.ts is None:
+                self.ts = data["ts"]
             self.logger.info(self.server)
 
     async def _get_users_chat(self, peer_id: int):
         async with self.session.get(
                 self._build_query(
-                    host=API_PATH,
+                    host=self.app.config.bot.api_url,
                     method="messages.getConversationMembers",
                     params={
                         "peer_id": peer_id,
@@ -126,82 +186,133 @@ class VkApiAccessor(BaseAccessor):
 
     async def get_users_from_chat(self, peer_id: int) -> List[User]:
         """ Получаем список юзеров из чата по peer_id """
-        users = []
         try:
             profiles = await self._get_users_chat(peer_id=peer_id)
         except KeyError as e:
             profiles = []
             self.logger.error("Exception", exc_info=e)
-        for profile in profiles:
-            user = await self.app.store.users.create_user(
+        users = await self.app.store.users.upsert_users([
+            User(
+                id=None,
                 vk_id=profile['id'],
                 first_name=profile["first_name"],
                 last_name=profile["last_name"],
-            )
-            users.append(user)
-        return users
+                points=0,
+            ) for profile in profiles
+        ])
+        return list(users.values())
 
     async def poll(self) -> List[Update]:
-        async with self.session.get(
-                self._build_query(
-                    host=self.server,
-                    method="",
-                    params={
-                        "act": "a_check",
-                        "key": self.key,
-                        "ts": self.ts,
-                        "wait": 30,
-                    },
-                )
-        ) as resp:
-            data = await resp.json()
-            self.logger.info(data)
-            self.ts = data["ts"]
-            raw_updates = data.get("updates", [])
-            updates = []
-            for update in raw_updates:
-                action = None
-                type_chat = 'public' if update["object"]["message"]["peer_id"] > 2000000000 else 'privat'
-                action_type = update.get("object", {}).get("message", {}).get("action", {}).get("type")
-                member_id = update.get("object", {}).get("message", {}).get("action", {}).get("member_id")
-                if action_type == UpdateStatus.INVITE_CHAT and abs(member_id) == self.app.config.bot.group_id:
-                    # бота пригласили в чат
-                    action = UpdateStatus.INVITE_CHAT
-                if action is None:
-                    payload = update.get("object", {}).get("message", {}).get("payload")
-                    action = json.loads(payload).get('button') if payload is not None else None
-
-                updates.append(
-                    Update(
-                        type=update["type"],
-                        action=action,
-                        object=UpdateObject(
-                            id=update["object"]["message"]["id"],
-                            user_id=update["object"]["message"]["from_id"],
-                            peer_id=update["object"]["message"]["peer_id"],
-                            body=update["object"]["message"]["text"],
-                            type_chat=type_chat,
-                        ),
+        return self.parse_updates(await self.fetch_updates())
+
+    async def fetch_updates(self) -> List[dict]:
+        """
+            Один запрос a_check к long poll серверу.
+            ts обновляется сразу после ответа, поэтому следующий запрос
+            можно отправлять, не дожидаясь разбора обновлений
+        """
+        with self.app.metrics.poll_seconds.time():
+            async with self.session.get(
+                    self._build_query(
+                        host=self.server,
+                        method="",
+                        params={
+                            "act": "a_check",
+                            "key": self.key,
+                            "ts": self.ts,
+                            "wait": 30,
+                        },
                     )
-                )
-            return updates
+            ) as resp:
+                data = await resp.json()
+        self.logger.debug(data)
+        failed = data.get("failed")
+        if failed == 1:
+            # история событий устарела, продолжаем с нового ts
+            self.ts = data["ts"]
+            return []
+        if failed == 2:
+            # истек key, ts оставляем прежним, чтобы не потерять события
+            await self._get_long_poll_service(refresh_ts=False)
+            return []
+        if failed == 3:
+            # информация утрачена, нужны новые key и ts
+            await self._get_long_poll_service()
+            return []
+        self.ts = data["ts"]
+        return data.get("updates", [])
 
-    async def send_message(self, message: Message, keyboard: str = None) -> None:
+    def parse_updates(self, raw_updates: List[dict]) -> List[Update]:
+        updates = []
+        for raw_update in raw_updates:
+            update = self.parse_update(raw_update)
+            if update is not None:
+                updates.append(update)
+        return updates
+
+    def parse_update(self, update: dict) -> Optional[Update]:
+        message = update.get("object", {}).get("message")
+        if message is None:
+            # нас интересуют только события с сообщениями
+            return None
+        action = None
+        type_chat = 'public' if message["peer_id"] > 2000000000 else 'privat'
+        action_type = message.get("action", {}).get("type")
+        member_id = message.get("action", {}).get("member_id")
+        if action_type == UpdateStatus.INVITE_CHAT and abs(member_id) == self.app.config.bot.group_id:
+            # бота пригласили в чат
+            action = UpdateStatus.INVITE_CHAT
+        if action is None:
+            payload = message.get("payload")
+            action = json.loads(payload).get('button') if payload is not None else None
+
+        return Update(
+            type=update["type"],
+            action=action,
+            object=UpdateObject(
+                id=message["id"],
+                user_id=message["from_id"],
+                peer_id=message["peer_id"],
+                body=message["text"],
+                type_chat=type_chat,
+            ),
+        )
+
+    def send_message(self, message: Message, keyboard: Union[str, dict, None] = None) -> Future:
+        """
+            Ставим сообщение в очередь отправки.
+            Возвращаемый future завершится, когда VK примет сообщение
+        """
         params = {
-            "random_id": random.randint(1, 2 ** 32),
+            # random_id не меняется при повторных попытках, VK отбрасывает дубли
+            "random_id": random.randint(1, 2 ** 31 - 1),
             "peer_id": message.peer_id,
             "message": message.text,
-            "access_token": self.app.config.bot.token,
         }
         if keyboard:
-            params["keyboard"] = json.dumps(keyboard)
+            # постоянные клавиатуры приходят уже закодированными
+            params["keyboard"] = keyboard if isinstance(keyboard, str) else dumps(keyboard)
+        return self.dispatcher.send(params)
 
-        async with self.session.get(
-                self._build_query(
-                    API_PATH,
-                    "messages.send",
-                    params=params,
-                )
+    async def execute_messages_send(self, calls: List[dict]) -> List[Optional[int]]:
+        """
+            Отправляем пачку сообщений одним вызовом execute.
+            Для неотправленных сообщений в результате None
+        """
+        async with self.session.post(
+                self.app.config.bot.api_url + "execute",
+                data={
+                    "code": build_execute_code(calls),
+                    "access_token": self.app.config.bot.token,
+                    "v": API_VERSION,
+                },
         ) as resp:
             data = await resp.json()
-            self.logger.info(data)
+        if "error" in data:
+            self.logger.error(data["error"])
+            return [None] * len(calls)
+        if "execute_errors" in data:
+            self.logger.warning(data["execute_errors"])
+        response = data.get("response") or []
+        results = [el if el else None for el in response]
+        return results + [None] * (len(calls) - len(results))
@@ -25,6 +25,10 @@ class Update:
     action: str
     object: UpdateObject
 
+    @classmethod
+    def from_dict(cls, data: dict) -> "Update":
+        return cls(type=data["type"], action=data["action"], object=UpdateObject(**data["object"]))
+
 
 @dataclass
 class Message:
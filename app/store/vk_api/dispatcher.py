@@ -0,0 +1,146 @@
+import asyncio
+import time
+import typing
+from asyncio import Future, Queue, Task
+from dataclasses import dataclass
+from typing import List, Optional, Set
+
+from app.web.utils import dumps
+
+if typing.TYPE_CHECKING:
+    from app.store.vk_api.accessor import VkApiAccessor
+
+
+class MessageNotDeliveredError(Exception):
+    """Вызывается, когда сообщение не удалось отправить после всех попыток"""
+
+    def __init__(self, params: dict):
+        super().__init__(f"message to {params.get('peer_id')} was not delivered")
+        self.params = params
+
+
+class TokenBucket:
+    """ Ограничитель частоты запросов: rate токенов в секунду, не больше capacity разом """
+
+    def __init__(self, rate: float, capacity: Optional[int] = None):
+        self.rate = rate
+        self.capacity = capacity or max(int(rate), 1)
+        self._tokens = float(self.capacity)
+        self._updated_at = time.monotonic()
+
+    async def acquire(self) -> None:
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+@dataclass
+class OutgoingMessage:
+    params: dict
+    future: Future
+    attempt: int = 0
+
+
+class MessageDispatcher:
+    """
+        Очередь исходящих сообщений.
+        Пачки до 25 сообщений отправляются одним вызовом execute,
+        частота запросов ограничена лимитом группы VK,
+        неудачные сообщения переотправляются с экспоненциальной задержкой
+    """
+    BATCH_SIZE = 25
+    RETRY_DELAY = 1.0  # секунд, удваивается с каждой попыткой
+
+    def __init__(self, vk_api: "VkApiAccessor", rate: float, retries: int = 3):
+        self.vk_api = vk_api
+        self.retries = retries
+        self.bucket = TokenBucket(rate=rate)
+        self.queue: Queue = Queue()
+        self.sent_total = 0
+        self.failed_total = 0
+        self._task: Optional[Task] = None
+        self._delayed: Set[Task] = set()
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """ Дожидаемся отправки накопленных сообщений """
+        if self._task is None:
+            return
+        while True:
+            await self.queue.join()
+            if not self._delayed:
+                break
+            await asyncio.wait(self._delayed)
+        self._task.cancel()
+        self._task = None
+
+    def send(self, params: dict) -> Future:
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(self._consume_exception)
+        self.queue.put_nowait(OutgoingMessage(params=params, future=future))
+        return future
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < self.BATCH_SIZE and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            try:
+                await self._send_batch(batch)
+            except Exception as e:
+                self.vk_api.logger.error("Exception", exc_info=e)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def _send_batch(self, batch: List[OutgoingMessage]) -> None:
+        await self.bucket.acquire()
+        try:
+            results = await self.vk_api.execute_messages_send([el.params for el in batch])
+        except Exception as e:
+            self.vk_api.logger.error("Exception", exc_info=e)
+            results = [None] * len(batch)
+
+        for message, result in zip(batch, results):
+            if result:
+                self.sent_total += 1
+                if not message.future.done():
+                    message.future.set_result(result)
+            else:
+                self._retry(message)
+
+    def _retry(self, message: OutgoingMessage) -> None:
+        message.attempt += 1
+        if message.attempt > self.retries:
+            self.failed_total += 1
+            self.vk_api.logger.error("message to %s was not delivered", message.params.get("peer_id"))
+            if not message.future.done():
+                message.future.set_exception(MessageNotDeliveredError(message.params))
+            return
+        task = asyncio.create_task(self._requeue(message, self.RETRY_DELAY * 2 ** (message.attempt - 1)))
+        self._delayed.add(task)
+        task.add_done_callback(self._delayed.discard)
+
+    async def _requeue(self, message: OutgoingMessage, delay: float) -> None:
+        await asyncio.sleep(delay)
+        self.queue.put_nowait(message)
+
+    @staticmethod
+    def _consume_exception(future: Future) -> None:
+        # ошибка уже залогирована, ждать доставку вызывающий код не обязан
+        if not future.cancelled():
+            future.exception()
+
+
+def build_execute_code(calls: List[dict]) -> str:
+    """ Код VKScript для пачки вызовов messages.send """
+    return "return [" + ",".join(
+        f"API.messages.send({dumps(params)})" for params in calls
+    ) + "];"
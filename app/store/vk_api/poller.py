@@ -1,38 +1,74 @@
 import asyncio
+import time
 from asyncio import Task
-from typing import Optional
+from logging import getLogger
+from typing import List, Optional, Union
 
+from app.cluster.transport import UpdateRouter
 from app.store import Store
-
-QUEUES = {}
+from app.store.vk_api.worker_pool import ChatWorkerPool
 
 
 class Poller:
-    def __init__(self, store: Store):
+    """
+        Опрос long poll сервера.
+        Обновления уходят в sink: в пул обработчиков этого процесса
+        или в маршрутизатор, который раздает их процессам-воркерам
+    """
+    RETRY_DELAY = 1  # секунд между попытками после ошибки запроса
+
+    def __init__(self, store: Store, sink: Union[ChatWorkerPool, UpdateRouter]):
         self.store = store
+        self.logger = getLogger("poller")
         self.is_running = False
         self.poll_task: Optional[Task] = None
+        self.fetch_task: Optional[Task] = None
+        self.last_poll_at: Optional[float] = None
+        self.sink = sink
 
     async def start(self):
         self.is_running = True
+        self.last_poll_at = time.monotonic()
+        self.sink.start()
         self.poll_task = asyncio.create_task(self.poll())
 
-    async def worker(self, queue):
-        while True:
-            update = await queue.get()
-            await self.store.bots_manager.handle_update(update)
-            queue.task_done()
-
     async def stop(self):
         self.is_running = False
+        if self.fetch_task:
+            # не ждем окончания long poll запроса, его ответ уже никто не обработает
+            self.fetch_task.cancel()
         await self.poll_task
+        await self.sink.stop()
+
+    def is_alive(self, max_age: float) -> bool:
+        """ Цикл опроса работает и получал ответ сервера не раньше max_age секунд назад """
+        if self.poll_task is None or self.poll_task.done():
+            return False
+        return time.monotonic() - self.last_poll_at <= max_age
 
     async def poll(self):
+        """
+            Следующий запрос к long poll серверу уходит сразу после получения ответа,
+            разбор и раздача обновлений идут, пока он ждет новых событий
+        """
+        self.fetch_task = asyncio.create_task(self.store.vk_api.fetch_updates())
         while self.is_running:
-            updates = await self.store.vk_api.poll()
-            for update in updates:
-                chat_id = update.object.peer_id
-                if QUEUES.get(chat_id) is None:
-                    QUEUES[chat_id] = asyncio.Queue()
-                    asyncio.create_task(self.worker(QUEUES[chat_id]))
-                QUEUES[chat_id].put_nowait(update)
+            raw_updates = await self._wait_fetch()
+            if not self.is_running:
+                break
+            self.fetch_task = asyncio.create_task(self.store.vk_api.fetch_updates())
+            for update in self.store.vk_api.parse_updates(raw_updates):
+                await self.sink.submit(update)
+
+    async def _wait_fetch(self) -> List[dict]:
+        try:
+            raw_updates = await self.fetch_task
+            self.last_poll_at = time.monotonic()
+            return raw_updates
+        except asyncio.CancelledError:
+            if self.is_running:
+                raise
+        except Exception as e:
+            self.logger.error("Exception", exc_info=e)
+            await asyncio.sleep(self.RETRY_DELAY)
+        return []
@@ -0,0 +1,98 @@
+import asyncio
+from asyncio import Event, Queue, Semaphore, Task
+from collections import deque
+from logging import getLogger
+from typing import Awaitable, Callable, Deque, Dict, List
+
+from app.store.vk_api.dataclasses import Update
+
+Handler = Callable[[Update], Awaitable]
+
+
+class ChatWorkerPool:
+    """
+        Пул обработчиков обновлений с фиксированным числом воркеров.
+        Чат в каждый момент обслуживает не больше одного воркера,
+        поэтому обновления одного чата обрабатываются по порядку.
+        Очередь чата удаляется, как только в ней не остается обновлений
+    """
+
+    def __init__(
+            self,
+            handler: Handler,
+            workers: int = 16,
+            max_pending: int = 10000,
+            max_chat_pending: int = 100,
+    ):
+        self.handler = handler
+        self.workers = workers
+        self.max_chat_pending = max_chat_pending
+        self.logger = getLogger("worker_pool")
+        self.dropped_total = 0
+        self._chats: Dict[int, Deque[Update]] = {}
+        self._ready: Queue = Queue()
+        self._slots = Semaphore(max_pending)
+        self._pending = 0
+        self._drained = Event()
+        self._drained.set()
+        self._tasks: List[Task] = []
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    @property
+    def active_chats(self) -> int:
+        return len(self._chats)
+
+    def start(self) -> None:
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        """ Дожидаемся обработки уже принятых обновлений и останавливаем воркеры """
+        await self._drained.wait()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, update: Update) -> None:
+        """ Ставим обновление в очередь чата, ждем, если пул переполнен """
+        chat_id = update.object.peer_id
+        queue = self._chats.get(chat_id)
+        if queue is not None and len(queue) >= self.max_chat_pending:
+            self.dropped_total += 1
+            self.logger.warning("chat %s queue is full, update dropped", chat_id)
+            return
+        await self._slots.acquire()
+        self._pending += 1
+        self._drained.clear()
+        queue = self._chats.get(chat_id)
+        if queue is None:
+            # чат не обслуживается ни одним воркером, ставим его в очередь
+            queue = self._chats[chat_id] = deque()
+            self._ready.put_nowait(chat_id)
+        queue.append(update)
+
+    async def _worker(self) -> None:
+        while True:
+            chat_id = await self._ready.get()
+            queue = self._chats[chat_id]
+            update = queue.popleft()
+            try:
+                await self.handler(update)
+            except Exception as e:
+                self.logger.error("Exception", exc_info=e)
+            finally:
+                self._done()
+            if queue:
+                # отдаем чат в конец очереди, чтобы один активный чат не занимал воркер
+                self._ready.put_nowait(chat_id)
+            else:
+                del self._chats[chat_id]
+
+    def _done(self) -> None:
+        self._slots.release()
+        self._pending -= 1
+        if self._pending == 0:
+            self._drained.set()
@@ -10,8 +10,12 @@ from aiohttp_session import setup as session_setup
 from aiohttp_session.cookie_storage import EncryptedCookieStorage
 
 from app.admin.models import Admin
+from app.cluster.roles import ProcessRole
+from app.monitoring.collectors import AppMetrics, setup_monitoring
 from app.store import setup_store, Store
 from app.store.database.database import Database
+from app.web.auth import setup_auth
+from app.web.cache import ResponseCache, TTLCache, setup_response_cache
 from app.web.config import Config, setup_config
 from app.web.logger import setup_logging
 from app.web.middlewares import setup_middlewares
@@ -22,6 +26,10 @@ class Application(AiohttpApplication):
     config: Optional[Config] = None
     store: Optional[Store] = None
     database: Optional[Database] = None
+    response_cache: Optional[ResponseCache] = None
+    verified_sessions: Optional[TTLCache] = None
+    metrics: Optional[AppMetrics] = None
+    role: ProcessRole = ProcessRole()
 
 
 class Request(AiohttpRequest):
@@ -49,9 +57,13 @@ class View(AiohttpView):
 app = Application()
 
 
-def setup_app(config_path: str) -> Application:
+def setup_app(config_path: str, role: Optional[ProcessRole] = None) -> Application:
     setup_logging(app)
     setup_config(app, config_path)
+    app.role = role or ProcessRole()
+    setup_response_cache(app)
+    setup_auth(app)
+    setup_monitoring(app)
     session_setup(app, EncryptedCookieStorage(app.config.session.key))
     setup_routes(app)
     setup_aiohttp_apispec(
@@ -0,0 +1,43 @@
+import typing
+from typing import Optional
+
+from aiohttp_session import STORAGE_KEY, get_session
+
+from app.admin.models import Admin
+from app.web.cache import TTLCache
+
+if typing.TYPE_CHECKING:
+    from app.web.app import Application, Request
+
+SESSION_CACHE_TTL = 300  # секунд
+SESSION_CACHE_SIZE = 1024
+
+
+def setup_auth(app: "Application"):
+    # расшифрованные cookie сессий админа, повторные запросы обходятся без Fernet
+    app.verified_sessions = TTLCache(ttl=SESSION_CACHE_TTL, maxsize=SESSION_CACHE_SIZE)
+
+
+async def get_admin(request: "Request") -> Optional[Admin]:
+    """
+        Админ текущего запроса.
+        Сессия расшифровывается только при первом обращении к cookie,
+        запросы без cookie сессии не стоят ничего
+    """
+    admin = getattr(request, "admin", None)
+    if admin is not None:
+        return admin
+    storage = request.get(STORAGE_KEY)
+    cookie = request.cookies.get(storage.cookie_name) if storage is not None else None
+    if not cookie:
+        return None
+    verified_sessions = request.app.verified_sessions
+    admin = verified_sessions.get(cookie)
+    if admin is None:
+        session = await get_session(request)
+        if "admin" not in session:
+            return None
+        admin = Admin.from_session(session)
+        verified_sessions.set(cookie, admin)
+    request.admin = admin
+    return admin
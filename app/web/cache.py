@@ -0,0 +1,189 @@
+import functools
+import hashlib
+import time
+import typing
+from abc import ABC, abstractmethod
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from aiohttp.web_response import Response
+
+from app.cluster.roles import Role
+
+if typing.TYPE_CHECKING:
+    from app.web.app import Application, Request
+
+
+class CacheBackend(ABC):
+    """ Хранилище кэша, бэкенд подключается через setup_response_cache """
+
+    @abstractmethod
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        ...
+
+    @abstractmethod
+    def set(self, key: Hashable, value: Any) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+
+class LRUCache(CacheBackend):
+    """ Кэш в памяти процесса, лишние записи вытесняются по LRU """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._items: "OrderedDict[Hashable, Any]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        if key not in self._items:
+            return default
+        self._items.move_to_end(key)
+        return self._items[key]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._items[key] = value
+        self._items.move_to_end(key)
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        self._items.pop(key, None)
+
+    def clear(self) -> None:
+        self._items.clear()
+
+
+class TTLCache(LRUCache):
+    """ LRU кэш, записи которого живут ttl секунд """
+
+    def __init__(self, ttl: float, maxsize: int = 1024):
+        super().__init__(maxsize=maxsize)
+        self.ttl = ttl
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        item = super().get(key)
+        if item is None:
+            return default
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            self.delete(key)
+            return default
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        super().set(key, (time.monotonic() + self.ttl, value))
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    content_type: str
+    etag: str
+
+    def to_response(self, request: "Request") -> Response:
+        if etag_matches(request.headers.get("If-None-Match"), self.etag):
+            return Response(status=304, headers={"ETag": self.etag})
+        return Response(body=self.body, content_type=self.content_type, headers={"ETag": self.etag})
+
+
+class ResponseCache:
+    """
+        Кэш готовых ответов GET запросов.
+        Ответ помечается тегами данных, на которых построен.
+        Аксессоры при записи вызывают invalidate с тегом, это увеличивает версию тега,
+        и записи со старой версией больше не находятся
+    """
+
+    def __init__(self, backend: CacheBackend, enabled: bool = True):
+        self.backend = backend
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._versions: Dict[str, int] = defaultdict(int)
+
+    def make_key(self, request: "Request", tags: Tuple[str, ...]) -> Hashable:
+        return request.method, request.path_qs, tuple(self._versions[tag] for tag in tags)
+
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        entry = self.backend.get(key)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def put(self, key: Hashable, response: Response) -> CachedResponse:
+        body = response.body
+        entry = CachedResponse(
+            body=body,
+            content_type=response.content_type,
+            etag='"%s"' % hashlib.blake2b(body, digest_size=16).hexdigest(),
+        )
+        self.backend.set(key, entry)
+        return entry
+
+    def invalidate(self, *tags: str) -> None:
+        for tag in tags:
+            self._versions[tag] += 1
+
+    def clear(self) -> None:
+        self.backend.clear()
+        self._versions.clear()
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """ Разбираем If-None-Match, слабое сравнение как требует RFC 7232 """
+    if not header:
+        return False
+    for value in header.split(","):
+        value = value.strip()
+        if value.startswith("W/"):
+            value = value[2:]
+        if value == "*" or value == etag:
+            return True
+    return False
+
+
+def cached_response(*tags: str) -> Callable:
+    """
+        Кэшируем успешный ответ метода View.
+        Декоратор ставится под декораторами aiohttp_apispec
+    """
+
+    def decorator(method: Callable) -> Callable:
+        @functools.wraps(method)
+        async def wrapper(self):
+            cache: ResponseCache = self.request.app.response_cache
+            if not cache.enabled:
+                return await method(self)
+            # версии тегов берем до запроса в БД: если данные изменятся
+            # во время обработки, запись сразу окажется устаревшей
+            key = cache.make_key(self.request, tags)
+            entry = cache.get(key)
+            if entry is None:
+                response = await method(self)
+                if response.status != 200:
+                    return response
+                entry = cache.put(key, response)
+            return entry.to_response(self.request)
+
+        return wrapper
+
+    return decorator
+
+
+def setup_response_cache(app: "Application", backend: Optional[CacheBackend] = None):
+    config = app.config.cache
+    if backend is None and app.role.name == Role.API:
+        # игры завершаются в процессах-воркерах, их сигналы сюда не доходят
+        backend = TTLCache(ttl=config.ttl, maxsize=config.maxsize)
+    if backend is None:
+        backend = LRUCache(maxsize=config.maxsize)
+    app.response_cache = ResponseCache(backend=backend, enabled=app.config.cache.enabled)
@@ -1,5 +1,6 @@
 import typing
 from dataclasses import dataclass
+from typing import Optional
 
 import yaml
 
@@ -18,10 +19,28 @@ class AdminConfig:
     password: str
 
 
+class BotMode:
+    LONG_POLL = "long_poll"
+    CALLBACK = "callback"
+
+
 @dataclass
 class BotConfig:
     token: str
     group_id: int
+    mode: str = BotMode.LONG_POLL
+    # строка, которую VK ждет в ответ на событие confirmation, и секретный ключ Callback API
+    confirmation_code: Optional[str] = None
+    secret: Optional[str] = None
+    api_url: str = "https://api.vk.com/method/"
+    requests_per_second: float = 20
+    send_retries: int = 3
+    workers: int = 16
+    max_pending_updates: int = 10000
+    max_chat_pending_updates: int = 100
+    # опечаток в ответе не больше answer_max_typos, ответы короче answer_typo_min_length сверяются точно
+    answer_max_typos: int = 1
+    answer_typo_min_length: int = 5
 
 
 @dataclass
@@ -31,6 +50,29 @@ class DatabaseConfig:
     user: str = "postgres"
     password: str = "postgres"
     database: str = "project"
+    pool_min_size: int = 1
+    pool_max_size: int = 10
+    statement_cache_size: int = 100
+    max_queries: int = 50000
+    max_inactive_connection_lifetime: float = 300.0
+    acquire_timeout: Optional[float] = 10.0
+
+
+@dataclass
+class CacheConfig:
+    enabled: bool = True
+    maxsize: int = 1024
+    # процесс api не узнает об изменениях из воркеров, поэтому там записи живут ttl секунд
+    ttl: float = 5
+
+
+@dataclass
+class ClusterConfig:
+    workers: int = 2
+    api_processes: int = 1
+    socket_dir: str = "/tmp/quiz_bot"
+    host: str = "0.0.0.0"
+    port: int = 8080
 
 
 @dataclass
@@ -39,13 +81,19 @@ class Config:
     session: SessionConfig = None
     bot: BotConfig = None
     database: DatabaseConfig = None
+    cache: CacheConfig = None
+    cluster: ClusterConfig = None
 
 
 def setup_config(app: "Application", config_path: str):
+    app.config = load_config(config_path)
+
+
+def load_config(config_path: str) -> Config:
     with open(config_path, "r") as f:
         raw_config = yaml.safe_load(f)
 
-    app.config = Config(
+    return Config(
         session=SessionConfig(
             key=raw_config["session"]["key"],
         ),
@@ -53,9 +101,8 @@ def setup_config(app: "Application", config_path: str):
             email=raw_config["admin"]["email"],
             password=raw_config["admin"]["password"],
         ),
-        bot=BotConfig(
-            token=raw_config["bot"]["token"],
-            group_id=raw_config["bot"]["group_id"],
-        ),
+        bot=BotConfig(**raw_config["bot"]),
         database=DatabaseConfig(**raw_config["database"]),
+        cache=CacheConfig(**raw_config.get("cache", {})),
+        cluster=ClusterConfig(**raw_config.get("cluster", {})),
     )
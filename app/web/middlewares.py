@@ -4,23 +4,13 @@ import typing
 from aiohttp.web_exceptions import HTTPUnprocessableEntity, HTTPException
 from aiohttp.web_middlewares import middleware
 from aiohttp_apispec import validation_middleware
-from aiohttp_session import get_session
 
-from app.admin.models import Admin
 from app.web.utils import error_json_response
 
 if typing.TYPE_CHECKING:
     from app.web.app import Application, Request
 
 
-@middleware
-async def auth_middleware(request: "Request", handler: callable):
-    session = await get_session(request)
-    if session:
-        request.admin = Admin.from_session(session)
-    return await handler(request)
-
-
 HTTP_ERROR_CODES = {
     400: "bad_request",
     401: "unauthorized",
@@ -29,6 +19,7 @@ HTTP_ERROR_CODES = {
     405: "not_implemented",
     409: "conflict",
     500: "internal_server_error",
+    503: "service_unavailable",
 }
 
 
@@ -58,6 +49,5 @@ async def error_handling_middleware(request: "Request", handler):
 
 
 def setup_middlewares(app: "Application"):
-    app.middlewares.append(auth_middleware)
     app.middlewares.append(error_handling_middleware)
     app.middlewares.append(validation_middleware)
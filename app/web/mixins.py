@@ -1,9 +1,11 @@
 from aiohttp.abc import StreamResponse
 from aiohttp.web_exceptions import HTTPUnauthorized
 
+from app.web.auth import get_admin
+
 
 class AuthRequiredMixin:
     async def _iter(self) -> StreamResponse:
-        if not getattr(self.request, "admin", None):
+        if await get_admin(self.request) is None:
             raise HTTPUnauthorized
         return await super(AuthRequiredMixin, self)._iter()
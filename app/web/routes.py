@@ -4,6 +4,13 @@ from aiohttp.web_app import Application
 def setup_routes(app: Application):
     from app.admin.routes import setup_routes as admin_setup_routes
     from app.quiz.routes import setup_routes as quiz_setup_routes
+    from app.monitoring.routes import setup_routes as monitoring_setup_routes
+    from app.bot.routes import setup_routes as bot_setup_routes
+    from app.web.config import BotMode
 
-    admin_setup_routes(app)
-    quiz_setup_routes(app)
+    if app.role.serves_api:
+        admin_setup_routes(app)
+        quiz_setup_routes(app)
+    if app.role.receives_updates and app.config.bot.mode == BotMode.CALLBACK:
+        bot_setup_routes(app)
+    monitoring_setup_routes(app)
@@ -0,0 +1,59 @@
+from typing import Any, Callable, List, Optional, Tuple
+
+from marshmallow import Schema, fields
+
+Serializer = Callable[[Any], dict]
+Converter = Optional[Callable[[Any], Any]]
+
+_MISSING = object()
+
+
+def compile_serializer(schema: Schema) -> Serializer:
+    """
+        Собираем функцию сериализации по полям схемы один раз.
+        Предназначена для доверенных внутренних объектов (dataclass и dict):
+        значения не валидируются, приводятся только Int, Float и DateTime,
+        результат совпадает с schema.dump
+    """
+    plan: List[Tuple[str, str, Converter]] = [
+        (field.data_key or name, field.attribute or name, _converter(field))
+        for name, field in schema.dump_fields.items()
+    ]
+
+    def serialize(obj: Any) -> dict:
+        if isinstance(obj, dict):
+            get = obj.get
+        else:
+            def get(attr, default):
+                return getattr(obj, attr, default)
+        result = {}
+        for key, attr, convert in plan:
+            value = get(attr, _MISSING)
+            if value is _MISSING:
+                continue
+            if convert is not None and value is not None:
+                value = convert(value)
+            result[key] = value
+        return result
+
+    return serialize
+
+
+def _converter(field: fields.Field) -> Converter:
+    if isinstance(field, fields.Nested):
+        nested = compile_serializer(field.schema)
+        if field.many:
+            return lambda value: [nested(el) for el in value]
+        return nested
+    if isinstance(field, fields.List):
+        inner = _converter(field.inner)
+        if inner is None:
+            return list
+        return lambda value: [inner(el) if el is not None else None for el in value]
+    if isinstance(field, fields.DateTime):
+        return lambda value: value.isoformat()
+    if isinstance(field, fields.Int):
+        return int
+    if isinstance(field, fields.Float):
+        return float
+    return None
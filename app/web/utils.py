@@ -1,13 +1,51 @@
+import dataclasses
+import datetime
+import json
 from typing import Any, Optional
 
-from aiohttp.web import json_response as aiohttp_json_response
 from aiohttp.web_response import Response
 
+try:
+    import orjson
+except ImportError:  # orjson необязателен, без него работает stdlib json
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if dataclasses.is_dataclass(obj):
+        return dataclasses.asdict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    def encode_json(data: Any) -> bytes:
+        """
+            Сериализуем в JSON, datetime и dataclass orjson понимает сам.
+            Ключи не строки (номера элементов в ошибках marshmallow) приводим к строкам, как stdlib json
+        """
+        return orjson.dumps(data, default=_default, option=orjson.OPT_NON_STR_KEYS)
+else:
+    _encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=_default)
+
+    def encode_json(data: Any) -> bytes:
+        """ Сериализуем в JSON, datetime и dataclass приводим через _default """
+        return _encoder.encode(data).encode("utf-8")
+
+
+def dumps(data: Any) -> str:
+    return encode_json(data).decode("utf-8")
+
+
+def _json_response(data: Any, status: int = 200) -> Response:
+    return Response(body=encode_json(data), status=status, content_type="application/json", charset="utf-8")
+
 
 def json_response(data: Any = None, status: str = "ok") -> Response:
     if data is None:
         data = {}
-    return aiohttp_json_response(
+    return _json_response(
         data={
             "status": status,
             "data": data,
@@ -23,7 +61,7 @@ def error_json_response(
 ):
     if data is None:
         data = {}
-    return aiohttp_json_response(
+    return _json_response(
         status=http_status,
         data={
             "status": status,
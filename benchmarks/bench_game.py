@@ -0,0 +1,68 @@
+"""
+    Стоимость обработки одного ответа в игре: 1000 игроков, каталог 50000 вопросов.
+    Запуск: python -m benchmarks.bench_game
+"""
+import random
+
+from app.quiz.models import Answer, Game, Question, User
+from benchmarks.utils import bench
+
+PLAYERS = 1000
+CATALOG = 50000
+
+
+def make_game() -> Game:
+    questions = {
+        i: Question(
+            id=i,
+            title=f"Вопрос {i}",
+            theme_id=1,
+            answers=[Answer(title=f"Ответ {j}", is_correct=j == 3) for j in range(4)],
+        ) for i in range(1, CATALOG + 1)
+    }
+    users = [
+        User(id=i, vk_id=100000 + i, first_name="Игрок", last_name=str(i), points=random.randint(0, 10) * 100)
+        for i in range(PLAYERS)
+    ]
+    return Game(
+        id=1,
+        chat_id=2000000001,
+        status=2,
+        current_question_id=CATALOG,
+        users=users,
+        questions=questions,
+        finish_question_ids=[],
+        started_at=None,
+        finished_at=None,
+        deck=list(questions),
+    )
+
+
+def scan_message(game: Game, questions: list, vk_id: int, text: str) -> bool:
+    """ Прежняя реализация: фильтрация списков на каждое сообщение """
+    question = [el for el in questions if el.id == game.current_question_id][0]
+    correct = [el for el in question.answers if el.is_correct][0]
+    [el for el in game.users if el.vk_id == vk_id]
+    sorted(game.users, key=lambda x: x.points, reverse=True)
+    return correct.title.lower() == text.lower()
+
+
+def indexed_message(game: Game, vk_id: int, text: str) -> bool:
+    correct = game.get_current_question().get_correct_answer()
+    user = game.get_user(vk_id)
+    game.add_points(user, 0)
+    game.get_winner()
+    return correct.title.lower() == text.lower()
+
+
+def main():
+    game = make_game()
+    questions = list(game.questions.values())
+    vk_id = game.users[-1].vk_id
+    bench("per message: list scans", lambda: scan_message(game, questions, vk_id, "ответ 3"), number=20)
+    bench("per message: indexes", lambda: indexed_message(game, vk_id, "ответ 3"), number=20000)
+    bench("next question: deck cursor", lambda: (game.draw_question(), setattr(game, "deck_cursor", 0)), number=20000)
+
+
+if __name__ == "__main__":
+    main()
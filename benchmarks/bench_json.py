@@ -0,0 +1,63 @@
+"""
+    Стоимость сериализации ответа API.
+    Запуск: python -m benchmarks.bench_json
+"""
+import datetime
+import json
+
+from app.store.vk_api.accessor import Keyboard
+from app.web import utils
+from benchmarks.utils import bench
+
+
+def questions_page(size: int = 50) -> dict:
+    return {
+        "status": "ok",
+        "data": {
+            "questions": [
+                {
+                    "id": i,
+                    "title": f"Вопрос номер {i}",
+                    "theme_id": 1,
+                    "answers": [
+                        {"title": f"Ответ {j}", "is_correct": j == 0} for j in range(4)
+                    ],
+                } for i in range(size)
+            ]
+        },
+    }
+
+
+def games_page(size: int = 50) -> dict:
+    now = datetime.datetime.utcnow()
+    return {
+        "status": "ok",
+        "data": {
+            "total": size,
+            "games": [
+                {
+                    "id": i,
+                    "chat_id": 2000000000 + i,
+                    "started_at": now.isoformat(),
+                    "finished_at": now.isoformat(),
+                    "duration": 120,
+                    "winner": {"vk_id": i, "points": 300},
+                } for i in range(size)
+            ],
+        },
+    }
+
+
+def main():
+    print("encoder:", "orjson" if utils.orjson is not None else "json (stdlib)")
+    for name, payload in (("questions x50", questions_page()), ("games x50", games_page())):
+        bench(f"{name}: aiohttp default json.dumps", lambda: json.dumps(payload).encode())
+        bench(f"{name}: encode_json", lambda: utils.encode_json(payload))
+
+    keyboard = json.loads(Keyboard.navigate)
+    bench("keyboard: json.dumps per message", lambda: json.dumps(keyboard))
+    bench("keyboard: pre-encoded", lambda: Keyboard.navigate)
+
+
+if __name__ == "__main__":
+    main()
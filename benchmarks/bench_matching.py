@@ -0,0 +1,38 @@
+"""
+    Проверка ответов игроков: нормализация и сравнение с допуском опечаток.
+    Запуск: python -m benchmarks.bench_matching
+"""
+import random
+
+from app.quiz.matching import AnswerMatcher, normalize_answer
+from benchmarks.utils import bench
+
+WORDS = ["Пётр", "Первый", "Москва", "Война", "и", "мир", "Санкт-Петербург", "Ломоносов", "Байкал", "Волга"]
+
+
+def make_answers(size: int = 1000) -> list:
+    random.seed(1)
+    return [" ".join(random.choice(WORDS) for _ in range(random.randint(1, 3))) for _ in range(size)]
+
+
+def typo(text: str) -> str:
+    i = random.randrange(len(text))
+    return text[:i] + "ъ" + text[i + 1:]
+
+
+def main():
+    matcher = AnswerMatcher(max_typos=1, min_length=5)
+    answers = make_answers()
+    keys = [normalize_answer(el) for el in answers]
+    exact = [(key, el.upper() + "!") for key, el in zip(keys, answers)]
+    typos = [(key, typo(el)) for key, el in zip(keys, answers)]
+    wrong = [(key, "совсем другой ответ") for key in keys]
+
+    bench("1000 answers: lower() ==", lambda: [a.lower() == b.lower() for a, (_, b) in zip(answers, exact)], number=20)
+    bench("1000 answers: exact after normalization", lambda: [matcher.is_correct(k, t) for k, t in exact], number=20)
+    bench("1000 answers: one typo", lambda: [matcher.is_correct(k, t) for k, t in typos], number=20)
+    bench("1000 answers: wrong", lambda: [matcher.is_correct(k, t) for k, t in wrong], number=20)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+    Сериализация списков: marshmallow против собранной заранее функции.
+    Запуск: python -m benchmarks.bench_serializers
+"""
+import datetime
+
+from app.admin.schemes import ListGameSchema
+from app.quiz.models import Answer, Question
+from app.quiz.schemes import ListQuestionSchema
+from app.web.serializers import compile_serializer
+from benchmarks.utils import bench
+
+
+def main():
+    questions = {
+        "questions": [
+            Question(
+                id=i,
+                title=f"Вопрос номер {i}",
+                theme_id=1,
+                answers=[Answer(title=f"Ответ {j}", is_correct=j == 0) for j in range(4)],
+            ) for i in range(500)
+        ]
+    }
+    now = datetime.datetime.utcnow()
+    games = {
+        "total": 50,
+        "games": [
+            {
+                "id": i,
+                "chat_id": 2000000000 + i,
+                "started_at": now,
+                "finished_at": now,
+                "duration": 120.5,
+                "winner": {"vk_id": i, "points": 300},
+            } for i in range(50)
+        ],
+    }
+
+    for name, schema_cls, data in (
+            ("questions x500", ListQuestionSchema, questions),
+            ("games x50", ListGameSchema, games),
+    ):
+        schema = schema_cls()
+        dump = compile_serializer(schema)
+        assert dump(data) == schema.dump(data)
+        bench(f"{name}: new schema per request", lambda: schema_cls().dump(data), number=100)
+        bench(f"{name}: shared schema", lambda: schema.dump(data), number=100)
+        bench(f"{name}: compiled serializer", lambda: dump(data), number=100)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,9 @@
+import timeit
+from typing import Callable
+
+
+def bench(name: str, func: Callable, number: int = 1000, repeat: int = 5) -> float:
+    """ Лучшее из repeat прогонов, время одного вызова в микросекундах """
+    best = min(timeit.repeat(func, number=number, repeat=repeat)) / number * 1e6
+    print(f"{name:<40} {best:>10.2f} us")
+    return best
@@ -1,7 +1,26 @@
+import argparse
 import os
 
-from app.web.app import setup_app
-from aiohttp.web import run_app
+from app.cluster.launcher import run_cluster, run_process
+from app.cluster.roles import ProcessRole, Role
+
+CLUSTER = "cluster"
 
 if __name__ == "__main__":
-    run_app(setup_app(config_path=os.path.join(os.path.dirname(__file__), 'config.yml')))
+    parser = argparse.ArgumentParser(description="Vk Quiz Bot")
+    parser.add_argument("--role", choices=Role.CHOICES + [CLUSTER], default=Role.ALL)
+    parser.add_argument("--index", type=int, default=0, help="номер воркера")
+    parser.add_argument("--workers", type=int, help="число воркеров, по умолчанию из config.yml")
+    parser.add_argument("--port", type=int)
+    args = parser.parse_args()
+
+    config_path = os.path.join(os.path.dirname(__file__), 'config.yml')
+    if args.role == CLUSTER:
+        run_cluster(config_path)
+    else:
+        from app.web.config import load_config
+
+        workers = args.workers or load_config(config_path).cluster.workers
+        if args.role == Role.ALL:
+            workers = 1
+        run_process(config_path, ProcessRole(name=args.role, index=args.index, workers=workers), port=args.port)
@@ -0,0 +1,105 @@
+import pytest
+from aiohttp import ClientSession, web
+from aiohttp.test_utils import TestClient
+
+from app.bot.routes import setup_routes
+from app.store import Store
+from app.store.bot.consts import BotMessage
+from app.store.vk_api.accessor import VkApiAccessor
+from app.store.vk_api.dataclasses import UpdateStatus
+from app.store.vk_api.dispatcher import MessageDispatcher
+from app.store.vk_api.worker_pool import ChatWorkerPool
+from app.web.app import Application
+from app.web.config import BotMode
+from tests.fake_vk import FakeVk
+
+CHAT_ID = 2000000001
+
+
+@pytest.fixture
+async def vk(config) -> FakeVk:
+    fake = await FakeVk(group_id=config.bot.group_id, secret=config.bot.secret).start()
+    yield fake
+    await fake.close()
+
+
+@pytest.fixture
+async def vk_api(server, store: Store, vk: FakeVk, mocker) -> VkApiAccessor:
+    """ Настоящий VkApiAccessor поверх FakeVk """
+    # хуки старта аксессора уходят в отдельное приложение, тестовое уже запущено
+    accessor = VkApiAccessor(web.Application())
+    accessor.app = server
+    mocker.patch.object(server.config.bot, "api_url", vk.api_url)
+    accessor.session = ClientSession()
+    accessor.dispatcher = MessageDispatcher(accessor, rate=100)
+    accessor.dispatcher.start()
+    accessor.pool = accessor.sink = ChatWorkerPool(handler=store.bots_manager.handle_update)
+    accessor.pool.start()
+    mocker.patch.object(store, "vk_api", accessor)
+    yield accessor
+    await accessor.pool.stop()
+    await accessor.dispatcher.stop()
+    await accessor.session.close()
+
+
+@pytest.fixture
+async def callback_cli(aiohttp_client, server, mocker) -> TestClient:
+    """
+        Приложение с /vk.callback поверх стора тестового сервера.
+        Тестовый конфиг работает через long poll, маршрут там не регистрируется
+    """
+    mocker.patch.object(server.config.bot, "mode", BotMode.CALLBACK)
+    app = Application()
+    app.config = server.config
+    app.store = server.store
+    setup_routes(app)
+    return await aiohttp_client(app)
+
+
+def invite_event(vk: FakeVk, config) -> dict:
+    return vk.message_event(
+        peer_id=CHAT_ID, action={"type": UpdateStatus.INVITE_CHAT, "member_id": -config.bot.group_id},
+    )
+
+
+class TestVkCallbackView:
+    async def test_confirmation(self, callback_cli, config):
+        resp = await callback_cli.post("/vk.callback", json={"type": "confirmation", "group_id": config.bot.group_id})
+        assert resp.status == 200
+        assert await resp.text() == config.bot.confirmation_code
+
+    async def test_wrong_group(self, callback_cli, config):
+        resp = await callback_cli.post("/vk.callback", json={"type": "confirmation", "group_id": config.bot.group_id + 1})
+        assert resp.status == 403
+
+    async def test_wrong_secret(self, callback_cli, vk: FakeVk, config):
+        event = invite_event(vk, config)
+        event["secret"] = "wrong"
+        resp = await callback_cli.post("/vk.callback", json=event)
+        assert resp.status == 403
+
+    async def test_invite(self, callback_cli, vk: FakeVk, vk_api: VkApiAccessor, config):
+        resp = await callback_cli.post("/vk.callback", json=invite_event(vk, config))
+        assert resp.status == 200
+        assert await resp.text() == "ok"
+        await vk_api.pool.stop()
+        await vk_api.dispatcher.stop()
+        assert [(el["peer_id"], el["message"]) for el in vk.sent] == [(CHAT_ID, BotMessage.INVITE_TEXT)]
+
+    async def test_retry_is_ignored(self, callback_cli, vk: FakeVk, vk_api: VkApiAccessor, config):
+        event = invite_event(vk, config)
+        for _ in range(2):
+            resp = await callback_cli.post("/vk.callback", json=event)
+            assert await resp.text() == "ok"
+        await vk_api.pool.stop()
+        await vk_api.dispatcher.stop()
+        assert len(vk.sent) == 1
+
+
+class TestLongPoll:
+    async def test_same_updates_as_callback(self, vk: FakeVk, vk_api: VkApiAccessor, config):
+        event = invite_event(vk, config)
+        await vk_api._get_long_poll_service()
+        vk.push(event)
+        assert await vk_api.poll() == [vk_api.parse_update(event)]
+        assert await vk_api.poll() == []
@@ -0,0 +1,83 @@
+import asyncio
+
+from app.cluster.roles import ProcessRole, Role, shard_for
+from app.cluster.transport import UpdateRouter, UpdateServer, socket_path
+from app.store.vk_api.dataclasses import Update
+from app.store.vk_api.worker_pool import ChatWorkerPool
+from tests.bot.test_worker_pool import make_update
+
+
+class TestProcessRole:
+    def test_owns_chat(self):
+        workers = [ProcessRole(name=Role.WORKER, index=index, workers=3) for index in range(3)]
+        for chat_id in range(2000000000, 2000000010):
+            assert [role.owns_chat(chat_id) for role in workers].count(True) == 1
+        assert ProcessRole().owns_chat(2000000001)
+        assert not ProcessRole(name=Role.API).owns_chat(2000000001)
+
+
+class TestUpdateRouter:
+    async def test_route_by_peer_id(self, tmp_path):
+        handled = {0: [], 1: []}
+        servers = []
+        for index in range(2):
+            async def handler(update: Update, index=index):
+                handled[index].append((update.object.peer_id, update.object.id))
+
+            pool = ChatWorkerPool(handler=handler, workers=2)
+            pool.start()
+            server = UpdateServer(path=socket_path(str(tmp_path), index), pool=pool)
+            await server.start()
+            servers.append(server)
+
+        router = UpdateRouter([socket_path(str(tmp_path), index) for index in range(2)])
+        router.start()
+        for message_id in range(5):
+            for peer_id in (1, 2, 3, 4):
+                await router.submit(make_update(peer_id, message_id))
+        await router.stop()
+
+        for _ in range(100):
+            if sum(len(el) for el in handled.values()) == 20:
+                break
+            await asyncio.sleep(0.01)
+        for server in servers:
+            await server.stop()
+            await server.pool.stop()
+
+        for index, updates in handled.items():
+            for peer_id in (1, 2, 3, 4):
+                expected = list(range(5)) if shard_for(peer_id, 2) == index else []
+                assert [el[1] for el in updates if el[0] == peer_id] == expected
+        assert router.dropped_total == 0
+
+    async def test_worker_down(self, tmp_path):
+        handled = []
+
+        async def handler(update: Update):
+            handled.append(update.object.peer_id)
+
+        # слушает только воркер 0, сокета воркера 1 нет
+        pool = ChatWorkerPool(handler=handler, workers=2)
+        pool.start()
+        server = UpdateServer(path=socket_path(str(tmp_path), 0), pool=pool)
+        await server.start()
+
+        router = UpdateRouter([socket_path(str(tmp_path), index) for index in range(2)])
+        router.start()
+        healthy = [peer_id for peer_id in range(1, 9) if shard_for(peer_id, 2) == 0]
+        for peer_id in range(1, 9):
+            # submit только ставит в очередь и не ждет недоступного воркера
+            await asyncio.wait_for(router.submit(make_update(peer_id, 1)), timeout=0.1)
+
+        for _ in range(100):
+            if len(handled) == len(healthy):
+                break
+            await asyncio.sleep(0.01)
+        assert sorted(handled) == healthy
+        assert router.down == {1}
+
+        await router.stop()
+        assert router.dropped_total == 8 - len(healthy)
+        await server.stop()
+        await pool.stop()
@@ -0,0 +1,51 @@
+from logging import getLogger
+
+import pytest
+
+from app.store.vk_api.dispatcher import MessageDispatcher, MessageNotDeliveredError
+
+
+class FakeVkApi:
+    def __init__(self, fail_times: int = 0):
+        self.logger = getLogger("fake_vk")
+        self.batches = []
+        self.fail_times = fail_times
+
+    async def execute_messages_send(self, calls):
+        self.batches.append(calls)
+        if self.fail_times:
+            self.fail_times -= 1
+            return [None] * len(calls)
+        return list(range(1, len(calls) + 1))
+
+
+class TestMessageDispatcher:
+    async def test_batching(self):
+        vk_api = FakeVkApi()
+        dispatcher = MessageDispatcher(vk_api, rate=100)
+        futures = [dispatcher.send({"peer_id": i}) for i in range(30)]
+        dispatcher.start()
+        await dispatcher.stop()
+
+        assert [len(el) for el in vk_api.batches] == [25, 5]
+        assert all(future.done() for future in futures)
+        assert dispatcher.sent_total == 30
+
+    async def test_retry(self):
+        vk_api = FakeVkApi(fail_times=1)
+        dispatcher = MessageDispatcher(vk_api, rate=100)
+        dispatcher.RETRY_DELAY = 0
+        dispatcher.start()
+        assert await dispatcher.send({"peer_id": 1}) == 1
+        assert len(vk_api.batches) == 2
+        await dispatcher.stop()
+
+    async def test_not_delivered(self):
+        vk_api = FakeVkApi(fail_times=10)
+        dispatcher = MessageDispatcher(vk_api, rate=100, retries=1)
+        dispatcher.RETRY_DELAY = 0
+        dispatcher.start()
+        with pytest.raises(MessageNotDeliveredError):
+            await dispatcher.send({"peer_id": 1})
+        assert dispatcher.failed_total == 1
+        await dispatcher.stop()
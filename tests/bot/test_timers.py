@@ -0,0 +1,40 @@
+import asyncio
+import datetime
+from logging import getLogger
+
+from app.store.bot.timers import TimerScheduler
+
+
+def after(seconds: float) -> datetime.datetime:
+    return datetime.datetime.utcnow() + datetime.timedelta(seconds=seconds)
+
+
+class TestTimerScheduler:
+    async def test_fire_in_order(self):
+        fired = []
+
+        async def callback(key):
+            fired.append(key)
+
+        timers = TimerScheduler(getLogger("timers"))
+        timers.schedule(key=1, deadline=after(0.05), callback=lambda: callback(1))
+        timers.schedule(key=2, deadline=after(0.01), callback=lambda: callback(2))
+        await asyncio.sleep(0.1)
+        assert fired == [2, 1]
+        assert len(timers) == 0
+        await timers.close()
+
+    async def test_cancel_and_reschedule(self):
+        fired = []
+
+        async def callback(key):
+            fired.append(key)
+
+        timers = TimerScheduler(getLogger("timers"))
+        timers.schedule(key=1, deadline=after(0.01), callback=lambda: callback("old"))
+        timers.schedule(key=1, deadline=after(0.03), callback=lambda: callback("new"))
+        timers.schedule(key=2, deadline=after(0.01), callback=lambda: callback(2))
+        timers.cancel(2)
+        await asyncio.sleep(0.06)
+        assert fired == ["new"]
+        await timers.close()
@@ -0,0 +1,52 @@
+import asyncio
+
+from app.store.vk_api.dataclasses import Update, UpdateObject
+from app.store.vk_api.worker_pool import ChatWorkerPool
+
+
+def make_update(peer_id: int, message_id: int) -> Update:
+    return Update(
+        type="message_new",
+        action=None,
+        object=UpdateObject(
+            id=message_id,
+            user_id=1,
+            peer_id=peer_id,
+            body="kek",
+            type_chat="public",
+        ),
+    )
+
+
+class TestChatWorkerPool:
+    async def test_chat_order(self):
+        handled = []
+
+        async def handler(update: Update):
+            await asyncio.sleep(0)
+            handled.append((update.object.peer_id, update.object.id))
+
+        pool = ChatWorkerPool(handler=handler, workers=2)
+        pool.start()
+        for message_id in range(10):
+            for peer_id in (1, 2, 3):
+                await pool.submit(make_update(peer_id, message_id))
+        await pool.stop()
+
+        assert len(handled) == 30
+        for peer_id in (1, 2, 3):
+            assert [el[1] for el in handled if el[0] == peer_id] == list(range(10))
+        assert pool.active_chats == 0
+        assert pool.pending == 0
+
+    async def test_chat_limit(self):
+        async def handler(update: Update):
+            pass
+
+        pool = ChatWorkerPool(handler=handler, workers=1, max_chat_pending=2)
+        for message_id in range(5):
+            await pool.submit(make_update(1, message_id))
+        assert pool.pending == 2
+        assert pool.dropped_total == 3
+        pool.start()
+        await pool.stop()
@@ -0,0 +1,100 @@
+import asyncio
+import itertools
+import json
+from typing import Dict, List, Optional
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+SEND_CALL = "API.messages.send("
+
+
+class FakeVk:
+    """
+        Локальный VK для тестов.
+        Отвечает на методы, которые вызывает бот, копит отправленные сообщения,
+        отдает события через long poll и умеет слать их в Callback API приложения
+    """
+
+    def __init__(self, group_id: int = 1, secret: Optional[str] = None):
+        self.group_id = group_id
+        self.secret = secret
+        self.sent: List[dict] = []
+        self.members: Dict[int, List[dict]] = {}
+        self.events: List[dict] = []
+        self._event_ids = itertools.count(1)
+        self._new_event = asyncio.Event()
+        self.server: Optional[TestServer] = None
+
+    async def start(self) -> "FakeVk":
+        app = web.Application()
+        app.router.add_route("*", "/method/execute", self._execute)
+        app.router.add_route("*", "/method/groups.getLongPollServer", self._long_poll_server)
+        app.router.add_route("*", "/method/messages.getConversationMembers", self._members)
+        app.router.add_get("/lp", self._a_check)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        return self
+
+    async def close(self) -> None:
+        await self.server.close()
+
+    @property
+    def api_url(self) -> str:
+        return str(self.server.make_url("/method/"))
+
+    def message_event(
+            self, peer_id: int, text: str = "", from_id: int = 1, payload: Optional[dict] = None,
+            action: Optional[dict] = None,
+    ) -> dict:
+        event_id = next(self._event_ids)
+        message = {"id": event_id, "from_id": from_id, "peer_id": peer_id, "text": text}
+        if payload is not None:
+            message["payload"] = json.dumps(payload)
+        if action is not None:
+            message["action"] = action
+        event = {
+            "type": "message_new",
+            "group_id": self.group_id,
+            "event_id": f"event-{event_id}",
+            "object": {"message": message},
+        }
+        if self.secret is not None:
+            event["secret"] = self.secret
+        return event
+
+    def push(self, event: dict) -> None:
+        """ Событие для следующего ответа long poll """
+        self.events.append(event)
+        self._new_event.set()
+
+    async def _execute(self, request: web.Request) -> web.Response:
+        code = (await request.post())["code"]
+        decoder = json.JSONDecoder()
+        results = []
+        position = code.find(SEND_CALL)
+        while position != -1:
+            params, end = decoder.raw_decode(code, position + len(SEND_CALL))
+            self.sent.append(params)
+            results.append(len(self.sent))
+            position = code.find(SEND_CALL, end)
+        return web.json_response({"response": results})
+
+    async def _long_poll_server(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            "response": {"key": "key", "server": str(self.server.make_url("/lp")), "ts": len(self.events)},
+        })
+
+    async def _members(self, request: web.Request) -> web.Response:
+        peer_id = int(request.query["peer_id"])
+        return web.json_response({"response": {"profiles": self.members.get(peer_id, [])}})
+
+    async def _a_check(self, request: web.Request) -> web.Response:
+        ts = int(request.query["ts"])
+        if ts >= len(self.events):
+            self._new_event.clear()
+            try:
+                await asyncio.wait_for(self._new_event.wait(), timeout=0.1)
+            except asyncio.TimeoutError:
+                pass
+        return web.json_response({"ts": len(self.events), "updates": self.events[ts:]})
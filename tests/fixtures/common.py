@@ -1,5 +1,5 @@
 import os
-from unittest.mock import AsyncMock
+from unittest.mock import AsyncMock, MagicMock
 import pytest
 from aiohttp.test_utils import TestClient, loop_context
 
@@ -27,7 +27,7 @@ def server():
     app.on_startup.clear()
     app.on_shutdown.clear()
     app.store.vk_api = AsyncMock()
-    app.store.vk_api.send_message = AsyncMock()
+    app.store.vk_api.send_message = MagicMock()
 
     app.database = Database(app)
     app.on_startup.append(app.database.connect)
@@ -46,6 +46,13 @@ def store(server) -> Store:
 @pytest.fixture(autouse=True, scope="function")
 async def clear_db(server):
     yield
+    await server.store.game_state.journal.flush()
+    server.store.game_state.clear()
+    await server.store.game_logic.timers.close()
+    server.store.quizzes.catalog.clear()
+    server.store.game.stats_cache.clear()
+    server.response_cache.clear()
+    server.verified_sessions.clear()
     db = server.database.db
     for table in db.sorted_tables:
         await db.status(db.text(f'TRUNCATE "{table.name}" CASCADE'))
@@ -35,7 +35,7 @@ async def game_1(store, user_1, user_2) -> Game:
 
 @pytest.fixture
 async def game_2(store, user_1, user_2) -> Game:
-    game = await store.game.create_game(chat_id=1, users=[user_1, user_2])
+    game = await store.game.create_game(chat_id=5, users=[user_1, user_2])
     yield game
 
 
@@ -53,7 +53,7 @@ async def game_3(store, user_1, user_2) -> Game:
 @pytest.fixture
 async def game_4(store, user_1, user_2) -> Game:
     game = await store.game.create_game(chat_id=3, users=[user_1, user_2])
-    user_2.points = 100
+    game.set_points(user_2, 100)
     await store.game.create_level_game(game=game, user=user_2)
     game = await store.game.set_status_for_game(
         status=StatusGame.FINISHED,
@@ -66,7 +66,7 @@ async def game_4(store, user_1, user_2) -> Game:
 @pytest.fixture
 async def game_5(store, user_1, user_2) -> Game:
     game = await store.game.create_game(chat_id=4, users=[user_1, user_2])
-    user_2.points = 100
+    game.set_points(user_2, 100)
     await store.game.create_level_game(game=game, user=user_2)
     game = await store.game.set_status_for_game(
         status=StatusGame.FINISHED,
@@ -78,7 +78,7 @@ async def game_5(store, user_1, user_2) -> Game:
 
 @pytest.fixture
 async def game_score(store, user_1, user_2) -> Game:
-    game = await store.game.create_game(chat_id=1, users=[user_1, user_2])
+    game = await store.game.create_game(chat_id=6, users=[user_1, user_2])
     yield game
 
 
@@ -1,3 +1,4 @@
+from app.web import auth
 from tests.utils import ok_response
 from app.store import Store
 import pytest
@@ -64,3 +65,18 @@ class TestAdminLoginView:
         assert resp.status == 405
         data = await resp.json()
         assert data["status"] == "not_implemented"
+
+
+class TestAdminCurrentView:
+    async def test_unauthorized(self, cli):
+        resp = await cli.get("/admin.current")
+        assert resp.status == 401
+
+    async def test_session_verified_once(self, authed_cli, config, mocker):
+        get_session = mocker.patch("app.web.auth.get_session", wraps=auth.get_session)
+        for _ in range(3):
+            resp = await authed_cli.get("/admin.current")
+            assert resp.status == 200
+            data = await resp.json()
+            assert data == ok_response({"id": 1, "email": config.admin.email})
+        assert get_session.call_count == 1
@@ -0,0 +1,77 @@
+import pytest
+
+from app.monitoring.metrics import Counter, Histogram, Registry
+from app.store import Store
+from app.store.vk_api.dataclasses import Update, UpdateObject, UpdateStatus
+from tests.utils import ok_response
+
+
+@pytest.fixture
+def no_vk(store: Store, mocker):
+    mocker.patch.object(store.vk_api, "poller", None)
+    mocker.patch.object(store.vk_api, "pool", None)
+    mocker.patch.object(store.vk_api, "dispatcher", None)
+
+
+class TestMetrics:
+    def test_histogram(self):
+        registry = Registry()
+        histogram = registry.register(Histogram("handler_seconds", "Handler", labelnames=("action",), buckets=(0.1, 1)))
+        histogram.observe(0.05, "start_game")
+        histogram.observe(0.5, "start_game")
+        assert registry.render().splitlines() == [
+            "# HELP handler_seconds Handler",
+            "# TYPE handler_seconds histogram",
+            'handler_seconds_bucket{action="start_game",le="0.1"} 1',
+            'handler_seconds_bucket{action="start_game",le="1"} 2',
+            'handler_seconds_bucket{action="start_game",le="+Inf"} 2',
+            'handler_seconds_sum{action="start_game"} 0.55',
+            'handler_seconds_count{action="start_game"} 2',
+        ]
+
+    def test_counter_escapes_labels(self):
+        counter = Counter("errors_total", "Errors", labelnames=("action",))
+        counter.inc('a"b')
+        assert counter.samples() == ['errors_total{action="a\\"b"} 1']
+
+    async def test_metrics_view(self, cli, store: Store, no_vk):
+        update = Update(
+            type="message_new",
+            action=UpdateStatus.RESULT_GAME,
+            object=UpdateObject(id=1, user_id=1, peer_id=1, body="", type_chat="chat"),
+        )
+        await store.bots_manager.handle_update(update)
+        resp = await cli.get("/metrics")
+        assert resp.status == 200
+        text = await resp.text()
+        assert f'bot_handler_seconds_count{{action="{UpdateStatus.RESULT_GAME}"}}' in text
+        assert "db_pool_in_use " in text
+        assert "game_active_total 0" in text
+
+    async def test_pool_metrics(self, cli, server, store: Store):
+        # пул инструментирован настоящим Database.connect при старте приложения
+        await store.quizzes.list_themes()
+        metrics = server.database.pool_metrics
+        assert metrics.max_size == server.config.database.pool_max_size
+        assert metrics.acquired_total > 0
+        assert metrics.in_use == 0 and metrics.waiting == 0
+
+
+class TestHealth:
+    async def test_health(self, cli, no_vk):
+        resp = await cli.get("/health")
+        assert resp.status == 200
+        assert await resp.json() == ok_response(data={"long_poll": True})
+
+    async def test_ready(self, cli, store: Store, no_vk):
+        await store.game_state.rebuild()
+        resp = await cli.get("/ready")
+        assert resp.status == 200
+        assert await resp.json() == ok_response(data={"database": True, "game_state": True, "long_poll": True})
+
+    async def test_not_ready(self, cli, no_vk):
+        resp = await cli.get("/ready")
+        assert resp.status == 503
+        data = await resp.json()
+        assert data["status"] == "service_unavailable"
+        assert data["data"]["game_state"] is False
@@ -1,5 +1,10 @@
+from typing import List
+
+import pytest
+from asyncpg.exceptions import UniqueViolationError
+
 from app.quiz.models import Game, GameModel, User, \
-    Winner, UserScore, UserModel
+    Winner, UserScore, UserModel, StatusGame, Question, Theme, Answer
 from app.store import Store
 from tests.utils import check_empty_table_exists
 from tests.utils import ok_response
@@ -25,6 +30,13 @@ class TestGamesStore:
     async def test_get_game_by_chat_id(self, cli, store: Store, game_1: Game):
         assert game_1 == await store.game.get_game_by_chat_id(game_1.chat_id)
 
+    async def test_one_active_game_per_chat(self, cli, store: Store, game_1: Game, game_3: Game):
+        with pytest.raises(UniqueViolationError):
+            await store.game.create_game(chat_id=game_1.chat_id, users=[])
+        # в чате с завершенной игрой новую начать можно
+        game = await store.game.create_game(chat_id=game_3.chat_id, users=[])
+        assert game == await store.game.get_active_game(game_3.chat_id)
+
     async def test_list_games(self, cli, store: Store, game_3: Game):
         games = await store.game.list_finish_games()
         assert games == [game_3]
@@ -40,6 +52,174 @@ class TestGamesStore:
         assert scores == [score]
 
 
+class TestGameState:
+    async def test_start_game(self, store: Store, user_1: User):
+        game = await store.game_state.start_game(chat_id=1, users=[user_1])
+        assert await store.game_state.get_game(chat_id=1) is game
+        assert game == await store.game.get_game_by_chat_id(chat_id=1)
+
+    async def test_write_behind(self, store: Store, question_1, user_1: User):
+        game = await store.game_state.start_game(chat_id=1, users=[user_1])
+        store.game_state.set_current_question(game=game, question_id=question_1.id)
+        assert await store.game_state.record_correct_answer(
+            game=game, user=user_1, points=100, question_id=question_1.id
+        )
+
+        game_db = await store.game.get_game_by_chat_id(chat_id=1)
+        assert game_db.finish_question_ids == [question_1.id]
+        assert game_db.get_user(user_1.vk_id).points == 100
+
+    async def test_commit_answer_once(self, store: Store, question_1: Question, question_2: Question, user_1: User):
+        game = await store.game.create_game(chat_id=1, users=[user_1])
+        await store.game.set_current_question_for_game(question_id=question_1.id, game_id=game.id)
+        answer = dict(game_id=game.id, question_id=question_1.id, user_id=user_1.id, points=100,
+                      next_question_id=question_2.id)
+        assert await store.game.commit_answer(**answer) == 100
+        # второй ответ на тот же вопрос уже не засчитывается
+        assert await store.game.commit_answer(**answer) is None
+
+        game_db = await store.game.get_game_by_chat_id(chat_id=1)
+        assert game_db.finish_question_ids == [question_1.id]
+        assert game_db.current_question_id == question_2.id
+        assert game_db.get_user(user_1.vk_id).points == 100
+
+    async def test_commit_last_answer_once(self, store: Store, question_1: Question, user_1: User):
+        game = await store.game.create_game(chat_id=1, users=[user_1])
+        await store.game.set_current_question_for_game(question_id=question_1.id, game_id=game.id)
+        # последний вопрос: текущий вопрос не меняется, повтор отсекается по пройденным
+        answer = dict(game_id=game.id, question_id=question_1.id, user_id=user_1.id, points=100)
+        assert await store.game.commit_answer(**answer) == 100
+        assert await store.game.commit_answer(**answer) is None
+
+        game_db = await store.game.get_game_by_chat_id(chat_id=1)
+        assert game_db.finish_question_ids == [question_1.id]
+        assert game_db.get_user(user_1.vk_id).points == 100
+
+    async def test_lost_answer_reloads_game(self, store: Store, question_1: Question, question_2: Question,
+                                           user_1: User, user_2: User):
+        game = await store.game_state.start_game(chat_id=1, users=[user_1, user_2])
+        store.game_state.set_current_question(game=game, question_id=question_1.id)
+        await store.game_state.journal.flush()
+        # ответ уже засчитан в БД в обход этого процесса
+        await store.game.commit_answer(
+            game_id=game.id, question_id=question_1.id, user_id=user_2.id, points=100, next_question_id=question_2.id,
+        )
+
+        won = await store.game_state.record_correct_answer(
+            game=game, user=user_1, points=100, question_id=question_1.id, next_question_id=question_2.id,
+        )
+        assert not won
+        # устаревшая копия заменена игрой из БД
+        reloaded = await store.game_state.get_game(chat_id=1)
+        assert reloaded is not game
+        assert reloaded.current_question_id == question_2.id
+        assert reloaded.finish_question_ids == [question_1.id]
+        assert reloaded.get_user(user_1.vk_id).points == 0
+        assert reloaded.get_user(user_2.vk_id).points == 100
+
+    async def test_failed_write_reloads_game(self, store: Store, user_1: User, mocker):
+        mocker.patch.object(store.game_state.journal, "RETRY_DELAY", 0)
+        game = await store.game_state.start_game(chat_id=1, users=[user_1])
+        failed_total = store.game_state.journal.failed_total
+
+        async def write():
+            raise ConnectionError("database is unavailable")
+
+        # очки есть только в памяти, запись в БД не удалась
+        game.add_points(game.users[0], 100)
+        store.game_state.journal.append(write, key=game.chat_id)
+        await store.game_state.journal.flush()
+
+        reloaded = await store.game_state.get_game(chat_id=1)
+        assert reloaded is not game
+        assert reloaded.get_user(user_1.vk_id).points == 0
+        assert store.game_state.journal.failed_total == failed_total + 1
+
+    async def test_finish_game(self, store: Store, user_1: User):
+        game = await store.game_state.start_game(chat_id=1, users=[user_1])
+        store.game_state.finish_game(game=game, winner_user_id=user_1.id)
+        assert await store.game_state.get_game(chat_id=1) is None
+        await store.game_state.journal.flush()
+        assert await store.game.get_game_by_chat_id(chat_id=1) is None
+
+    async def test_rebuild(self, store: Store, game_1: Game, game_3: Game):
+        await store.game_state.rebuild()
+        assert store.game_state.games == [game_1]
+        assert await store.game_state.get_game(chat_id=game_3.chat_id) is None
+
+
+class TestGameLeader:
+    @staticmethod
+    def make_game(*points: int) -> Game:
+        users = [
+            User(id=i, vk_id=100 + i, first_name=f"Игрок {i}", last_name="", points=el)
+            for i, el in enumerate(points)
+        ]
+        return Game(
+            id=1, chat_id=1, status=StatusGame.STARTED, current_question_id=None, users=users, questions={},
+            finish_question_ids=[], started_at=None, finished_at=None,
+        )
+
+    def test_ties_by_seat(self):
+        game = self.make_game(0, 0, 0)
+        first, second, third = game.users
+        assert game.get_winner() is first
+
+        game.add_points(third, 100)
+        assert game.get_winner() is third
+        # при равенстве очков выигрывает тот, кто раньше в списке
+        game.add_points(second, 100)
+        assert game.get_winner() is second
+        game.add_points(third, 100)
+        assert game.get_winner() is third
+        assert game.get_winner() is game.get_scoreboard()[0]
+
+    def test_restored_and_set_points(self):
+        game = self.make_game(100, 200, 200)
+        first, second, third = game.users
+        assert game.get_winner() is second
+
+        game.set_points(second, 0)
+        assert game.get_winner() is third
+        game.set_points(third, 100)
+        assert game.get_winner() is first
+
+
+class TestQuestionDeck:
+    async def test_deck(self, store: Store, question_1: Question, question_2: Question):
+        game = await store.game.create_game(chat_id=1, users=[])
+        assert sorted(game.deck) == [question_1.id, question_2.id]
+        drawn = [game.draw_question(), game.draw_question()]
+        assert sorted(el.id for el in drawn) == [question_1.id, question_2.id]
+        assert game.draw_question() is None
+
+    async def test_theme_deck(self, store: Store, question_1: Question, theme_2: Theme, answers: List[Answer]):
+        question = await store.quizzes.create_question(title="theme 2", theme_id=theme_2.id, answers=answers)
+        game = await store.game.create_game(chat_id=1, users=[], theme_id=theme_2.id)
+        assert game.deck == [question.id]
+
+    async def test_avoid_recent_questions(self, store: Store, question_1: Question, question_2: Question):
+        game = await store.game.create_game(chat_id=1, users=[])
+        asked = game.draw_question()
+        await store.game.set_current_question_for_game(
+            question_id=asked.id, game_id=game.id, deck_cursor=game.deck_cursor,
+        )
+        await store.game.set_status_for_game(status=StatusGame.FINISHED, game=game)
+
+        game = await store.game.create_game(chat_id=1, users=[])
+        assert game.deck[0] != asked.id
+        assert sorted(game.deck) == [question_1.id, question_2.id]
+
+    async def test_cursor_restored(self, store: Store, question_1: Question, question_2: Question):
+        game = await store.game_state.start_game(chat_id=1, users=[])
+        question = game.draw_question()
+        store.game_state.set_current_question(game=game, question_id=question.id)
+        await store.game_state.journal.flush()
+        game_db = await store.game.get_game_by_chat_id(chat_id=1)
+        assert game_db.deck_cursor == 1
+        assert game_db.get_current_question() == question
+
+
 class TestUsersStore:
 
     async def test_create_user(
@@ -58,6 +238,18 @@ class TestUsersStore:
     async def test_get_user_by_vk_id(self, cli, store: Store, user_1: User):
         assert user_1 == await store.users.get_user_by_vk_id(user_1.vk_id)
 
+    async def test_upsert_users(self, cli, store: Store, user_1: User):
+        users = await store.users.upsert_users([
+            User(id=None, vk_id=user_1.vk_id, first_name='Иван', last_name='Сидоров', points=0),
+            User(id=None, vk_id=333, first_name='Анна', last_name='Петрова', points=0),
+        ])
+        assert list(users) == [user_1.vk_id, 333]
+        assert users[user_1.vk_id].id == user_1.id
+        assert users[user_1.vk_id].last_name == 'Сидоров'
+
+        users_db = await UserModel.query.gino.all()
+        assert len(users_db) == 2
+
 
 class TestGameListView:
     async def test_empty(self, cli):
@@ -113,6 +305,20 @@ class TestGameListView:
             }
         )
 
+    async def test_after_id(self, cli, game_4: Game, game_5: Game):
+        resp = await cli.get("/admin.fetch_games", params={"after_id": game_4.id})
+        assert resp.status == 200
+        data = await resp.json()
+        assert data["data"]["total"] == 2
+        assert [el["id"] for el in data["data"]["games"]] == [game_5.id]
+
+    async def test_game_without_winner(self, cli, store: Store, game_1: Game):
+        await store.game.set_status_for_game(status=StatusGame.FINISHED, game=game_1)
+        resp = await cli.get("/admin.fetch_games")
+        data = await resp.json()
+        assert data["data"]["total"] == 1
+        assert data["data"]["games"][0]["winner"] == {"vk_id": None, "points": None}
+
 
 class TestFetchGameListView:
     async def test_emptympty(self, cli):
@@ -156,6 +362,16 @@ class TestFetchGameListView:
             }
         )
 
+    async def test_cache_invalidated_on_finish(self, cli, store: Store, user_1: User, user_2: User):
+        resp = await cli.get("/admin.fetch_game_stats")
+        assert (await resp.json())["data"]["games_total"] == 0
+        game = await store.game.create_game(chat_id=3, users=[user_1, user_2])
+        await store.game.set_status_for_game(status=StatusGame.FINISHED, game=game, winner_user_id=user_2.id)
+        resp = await cli.get("/admin.fetch_game_stats")
+        data = await resp.json()
+        assert data["data"]["games_total"] == 1
+        assert [el["vk_id"] for el in data["data"]["winners_top"]] == [user_2.vk_id]
+
     async def test_several_fetch_games(self, cli, game_4: Game, game_5: Game, user_2: User):
         resp = await cli.get("/admin.fetch_game_stats")
         assert resp.status == 200
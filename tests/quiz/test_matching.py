@@ -0,0 +1,35 @@
+from app.quiz.matching import AnswerMatcher, normalize_answer, within_distance
+
+
+class TestNormalizeAnswer:
+    def test_normalize(self):
+        assert normalize_answer("  Ёлка,   зелёная! ") == "елка зеленая"
+        assert normalize_answer("«Война и мир»") == "война и мир"
+        assert normalize_answer("Санкт-Петербург") == "санкт петербург"
+
+
+class TestWithinDistance:
+    def test_distance(self):
+        assert within_distance("москва", "москва", 0)
+        assert within_distance("москва", "масква", 1)
+        assert within_distance("москва", "моска", 1)
+        assert within_distance("москва", "москваа", 1)
+        assert not within_distance("москва", "мсква", 0)
+        assert not within_distance("москва", "маскав", 1)
+        assert not within_distance("москва", "киев", 2)
+
+
+class TestAnswerMatcher:
+    def test_is_correct(self):
+        matcher = AnswerMatcher(max_typos=1, min_length=5)
+        expected = normalize_answer("Пётр Первый")
+        assert matcher.is_correct(expected, "петр первый")
+        assert matcher.is_correct(expected, "Пётр  Первый!")
+        assert matcher.is_correct(expected, "петр перый")
+        assert not matcher.is_correct(expected, "павел первый")
+
+    def test_exact_for_short_and_numbers(self):
+        matcher = AnswerMatcher(max_typos=2, min_length=5)
+        assert not matcher.is_correct("кот", "кит")
+        assert not matcher.is_correct("1945", "1946")
+        assert matcher.is_correct("1945", " 1945. ")
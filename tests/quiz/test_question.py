@@ -1,3 +1,4 @@
+import json
 from typing import List
 
 from asyncpg import (
@@ -7,6 +8,8 @@ from asyncpg import (
 )
 
 from app.quiz.models import Question, Answer, Theme, QuestionModel, AnswerModel
+from app.quiz.schemes import ListQuestionSchema
+from app.web.serializers import compile_serializer
 from app.store import Store
 from tests.quiz import question2dict
 from tests.utils import ok_response
@@ -75,6 +78,29 @@ class TestQuestionsStore:
         assert len(objs) == 0
 
 
+class TestQuestionCatalog:
+    async def test_load(self, store: Store, question_1: Question, question_2: Question):
+        catalog = await store.quizzes.get_catalog()
+        assert catalog.questions == [question_1, question_2]
+        assert catalog.get(question_1.id) == question_1
+        assert catalog.by_theme(question_1.theme_id) == [question_1, question_2]
+
+    async def test_refresh_on_create(
+        self, store: Store, theme_1: Theme, question_1: Question, answers: List[Answer]
+    ):
+        catalog = await store.quizzes.get_catalog()
+        version = catalog.version
+        question = await store.quizzes.create_question("title", theme_1.id, answers)
+        assert catalog.version > version
+        assert catalog.get(question.id) == question
+        assert catalog.questions == [question_1, question]
+
+    async def test_game_references_catalog(self, store: Store, question_1: Question):
+        game = await store.game.create_game(chat_id=1, users=[])
+        catalog = await store.quizzes.get_catalog()
+        assert game.questions is catalog.index
+
+
 class TestQuestionAddView:
     async def test_success(self, authed_cli, theme_1):
         resp = await authed_cli.post(
@@ -225,15 +251,141 @@ class TestQuestionListView:
         assert data == ok_response(data={"questions": []})
 
     async def test_one_question(self, authed_cli, question_1):
-        resp = await authed_cli.get("/quiz.list_questions")
+        resp = await authed_cli.get("/quiz.list_questions", params={"with_answers": "true"})
         assert resp.status == 200
         data = await resp.json()
         assert data == ok_response(data={"questions": [question2dict(question_1)]})
 
-    async def test_several_questions(self, authed_cli, question_1, question_2):
+    async def test_without_answers(self, authed_cli, question_1):
         resp = await authed_cli.get("/quiz.list_questions")
         assert resp.status == 200
         data = await resp.json()
+        question = question2dict(question_1)
+        del question["answers"]
+        assert data == ok_response(data={"questions": [question]})
+
+    async def test_keyset_pagination(self, authed_cli, question_1, question_2):
+        resp = await authed_cli.get("/quiz.list_questions", params={"limit": 1})
+        data = await resp.json()
+        assert [el["id"] for el in data["data"]["questions"]] == [question_1.id]
+
+        resp = await authed_cli.get("/quiz.list_questions", params={"limit": 1, "after_id": question_1.id})
+        data = await resp.json()
+        assert [el["id"] for el in data["data"]["questions"]] == [question_2.id]
+
+    async def test_title_prefix(self, authed_cli, question_1, question_2):
+        resp = await authed_cli.get("/quiz.list_questions", params={"title_prefix": "are you"})
+        data = await resp.json()
+        assert [el["id"] for el in data["data"]["questions"]] == [question_2.id]
+
+    async def test_several_questions(self, authed_cli, question_1, question_2):
+        resp = await authed_cli.get("/quiz.list_questions", params={"with_answers": "true"})
+        assert resp.status == 200
+        data = await resp.json()
         assert data == ok_response(
             data={"questions": [question2dict(question_1), question2dict(question_2)]}
         )
+
+    async def test_compiled_serializer_matches_schema(self, question_1: Question, question_2: Question):
+        data = {"questions": [question_1, question_2]}
+        for schema in (ListQuestionSchema(), ListQuestionSchema(exclude=("questions.answers",))):
+            assert compile_serializer(schema)(data) == schema.dump(data)
+
+
+class TestQuestionImportView:
+    async def test_unauthorized(self, cli):
+        resp = await cli.post("/quiz.import_questions", data=b"")
+        assert resp.status == 401
+
+    async def test_ndjson(self, authed_cli, store: Store, theme_1, question_1):
+        lines = [
+            {
+                "title": "How many legs does an octopus have?",
+                "theme_id": theme_1.id,
+                "answers": [{"title": "2", "is_correct": False}, {"title": "8", "is_correct": True}],
+            },
+            {
+                "title": question_1.title,
+                "theme_id": theme_1.id,
+                "answers": [{"title": "2", "is_correct": False}, {"title": "8", "is_correct": True}],
+            },
+            {
+                "title": "no correct answers",
+                "theme_id": theme_1.id,
+                "answers": [{"title": "2", "is_correct": False}, {"title": "8", "is_correct": False}],
+            },
+        ]
+        body = "\n".join(json.dumps(el) for el in lines) + "\nnot json\n"
+        resp = await authed_cli.post(
+            "/quiz.import_questions",
+            data=body.encode(),
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+        assert resp.status == 200
+        data = (await resp.json())["data"]
+        assert data["imported"] == 1
+        assert data["errors_total"] == 3
+        assert [el["line"] for el in data["errors"]] == [2, 3, 4]
+
+        question = await store.quizzes.get_question_by_title("How many legs does an octopus have?")
+        assert question.answers == [Answer(title="2", is_correct=False), Answer(title="8", is_correct=True)]
+
+    async def test_ndjson_nested_errors(self, authed_cli, store: Store, theme_1):
+        lines = [
+            {
+                "title": "How many legs does an octopus have?",
+                "theme_id": theme_1.id,
+                "answers": [{"title": "2", "is_correct": False}, {"title": "8", "is_correct": True}],
+            },
+            {
+                "title": "answer without title",
+                "theme_id": theme_1.id,
+                "answers": [{"is_correct": False}, {"title": "8", "is_correct": True}],
+            },
+        ]
+        resp = await authed_cli.post(
+            "/quiz.import_questions",
+            data="\n".join(json.dumps(el) for el in lines).encode(),
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+        assert resp.status == 200
+        data = (await resp.json())["data"]
+        assert data["imported"] == 1
+        # ошибки элементов списка marshmallow отдает по номеру элемента
+        assert data["errors"] == [
+            {"line": 2, "errors": {"answers": {"0": {"title": ["Missing data for required field."]}}}}
+        ]
+
+    async def test_csv(self, authed_cli, store: Store, theme_1):
+        body = "title,theme_id,correct,wrong\n" \
+               f"How many legs does an octopus have?,{theme_1.id},8,2\n" \
+               f"unknown theme,{theme_1.id + 100},8,2\n"
+        resp = await authed_cli.post(
+            "/quiz.import_questions",
+            data=body.encode(),
+            headers={"Content-Type": "text/csv"},
+        )
+        assert resp.status == 200
+        data = (await resp.json())["data"]
+        assert data["imported"] == 1
+        assert data["errors"] == [{"line": 3, "errors": {"theme_id": ["Theme not found."]}}]
+
+        question = await store.quizzes.get_question_by_title("How many legs does an octopus have?")
+        assert question.get_correct_answer().title == "8"
+
+    async def test_csv_multiline_field(self, authed_cli, store: Store, theme_1):
+        body = "title,theme_id,correct,wrong\n" \
+               f"\"Which animal says\n\"\"moo\"\"?\",{theme_1.id},cow,cat\n" \
+               f"unknown theme,{theme_1.id + 100},8,2\n"
+        resp = await authed_cli.post(
+            "/quiz.import_questions",
+            data=body.encode(),
+            headers={"Content-Type": "text/csv"},
+        )
+        assert resp.status == 200
+        data = (await resp.json())["data"]
+        assert data["imported"] == 1
+        assert data["errors"] == [{"line": 4, "errors": {"theme_id": ["Theme not found."]}}]
+
+        question = await store.quizzes.get_question_by_title("Which animal says\n\"moo\"?")
+        assert question.get_correct_answer().title == "cow"
@@ -126,6 +126,23 @@ class TestThemeList:
             data={"themes": [theme2dict(theme_1), theme2dict(theme_2)]}
         )
 
+    async def test_not_modified(self, authed_cli, theme_1):
+        resp = await authed_cli.get("/quiz.list_themes")
+        etag = resp.headers["ETag"]
+        resp = await authed_cli.get("/quiz.list_themes", headers={"If-None-Match": etag})
+        assert resp.status == 304
+        assert resp.headers["ETag"] == etag
+
+    async def test_cache_invalidated_on_create(self, authed_cli, store: Store, theme_1):
+        resp = await authed_cli.get("/quiz.list_themes")
+        etag = resp.headers["ETag"]
+        theme_2 = await store.quizzes.create_theme(title="new theme")
+        resp = await authed_cli.get("/quiz.list_themes", headers={"If-None-Match": etag})
+        assert resp.status == 200
+        assert resp.headers["ETag"] != etag
+        data = await resp.json()
+        assert data == ok_response(data={"themes": [theme2dict(theme_1), theme2dict(theme_2)]})
+
     async def test_different_method(self, authed_cli):
         resp = await authed_cli.post("/quiz.list_themes")
         assert resp.status == 405